@@ -8,6 +8,7 @@ from flask import Flask, render_template, request, jsonify, send_file
 from flask_cors import CORS
 import os
 import json
+import math
 import threading
 import time
 from pathlib import Path
@@ -152,14 +153,32 @@ def process_video_background(job_id, url, formats):
         # Create clips with parallel processing
         video_name = Path(video_path).stem
         output_files = []
-        total_clips = len(clips) * len(formats)
         current_clip = 0
         
+        # Probe the source once for every clip and format
+        try:
+            source_info = generator._source_info(video_path)
+        except Exception as e:
+            jobs[job_id]['status'] = 'error'
+            jobs[job_id]['error'] = f'Could not open video: {e}'
+            return
+        
+        ranges = []
+        for i, clip_info in enumerate(clips):
+            # Clamp to the real duration so captions and the cut cover the same range
+            end = min(clip_info["end_time"], source_info["duration"])
+            if end > clip_info["start_time"]:
+                ranges.append((i, clip_info, end))
+        
+        # Transcribe every range in one batch; the formats of a clip share its captions
+        all_segments = generator._transcribe_clips_audio(
+            video_path, [(clip_info["start_time"], end) for _, clip_info, end in ranges]
+        )
+        
         # Prepare all clip tasks
         clip_tasks = []
-        for i, clip_info in enumerate(clips):
+        for (i, clip_info, end), segments in zip(ranges, all_segments):
             start = clip_info["start_time"]
-            end = clip_info["end_time"]
             
             for format_type in formats:
                 output_filename = f"{video_name}_clip{i+1}_{format_type}.mp4"
@@ -174,12 +193,16 @@ def process_video_background(job_id, url, formats):
                     'output_path': str(output_path),
                     'format_type': format_type,
                     'clip_title': clip_title,
+                    'segments': segments,
                     'output_filename': output_filename,
                     'clip_info': clip_info
                 })
+        total_clips = len(clip_tasks)
         
         # Process clips with limited parallelism (max 2-3 at a time to avoid overwhelming system)
         max_workers = min(3, len(clip_tasks))
+        # Split the CPU between the concurrent x264 encodes instead of each taking all of it
+        encoder_threads = max(1, (os.cpu_count() or 2) // max_workers) if max_workers > 1 else 0
         completed = 0
         lock = threading.Lock()
         
@@ -193,7 +216,9 @@ def process_video_background(job_id, url, formats):
                     jobs[job_id]['message'] = f'Creating clip {current_clip}/{total_clips}: {task["clip_title"]} ({task["format_type"]})...'
                 
                 if generator.create_clip(task['video_path'], task['start'], task['end'], 
-                                       task['output_path'], task['format_type'], task['clip_title']):
+                                       task['output_path'], task['format_type'], task['clip_title'],
+                                       source_info=source_info, segments=task['segments'],
+                                       encoder_threads=encoder_threads):
                     thumbnail_path = generator.output_dir / f"{Path(task['output_path']).stem}.jpg"
                     
                     # Get file metadata
@@ -273,10 +298,11 @@ def process_video_background(job_id, url, formats):
             'output_count': len(output_files)
         })
         
-        # Save each clip to library
+        # Save all clips to library in one transaction
         video_title = Path(video_path).stem
+        clips_data = []
         for file_info in output_files:
-            clip_data = {
+            clips_data.append({
                 'job_id': job_id,
                 'video_url': url,
                 'video_title': video_title,
@@ -291,8 +317,8 @@ def process_video_background(job_id, url, formats):
                 'end_time': None,
                 'duration': None,
                 'tags': []
-            }
-            library.save_clip(clip_data)
+            })
+        library.save_clips(clips_data)
         
     except Exception as e:
         jobs[job_id]['status'] = 'error'
@@ -395,10 +421,14 @@ def get_library_clips():
     max_score = request.args.get('max_score', type=float)
     date_from = request.args.get('date_from')
     date_to = request.args.get('date_to')
+    tag = request.args.get('tag')
     sort_by = request.args.get('sort_by', 'created_at')
     sort_order = request.args.get('sort_order', 'DESC')
     limit = request.args.get('limit', 50, type=int)
     offset = request.args.get('offset', 0, type=int)
+    # Keyset paging: pass back the previous response's next_cursor
+    after_id = request.args.get('after_id', type=int)
+    after = (request.args.get('after_value'), after_id) if after_id is not None else None
     
     clips = library.get_clips(
         limit=limit,
@@ -410,14 +440,18 @@ def get_library_clips():
         date_from=date_from,
         date_to=date_to,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        after=after,
+        tag=tag
     )
     
+    next_cursor = library.next_cursor(clips, sort_by)
     return jsonify({
         'clips': clips,
         'count': len(clips),
         'limit': limit,
-        'offset': offset
+        'offset': offset,
+        'next_cursor': {'after_value': next_cursor[0], 'after_id': next_cursor[1]} if next_cursor else None
     })
 
 @app.route('/api/library/clip/<int:clip_id>')
@@ -642,6 +676,13 @@ def edit_clip():
         trim_start = data.get('trim_start')
         trim_end = data.get('trim_end')
         speed = data.get('speed')
+        if speed is not None:
+            try:
+                speed = float(speed)
+            except (TypeError, ValueError):
+                speed = None
+            if speed is None or not math.isfinite(speed) or speed <= 0:
+                return jsonify({'error': 'speed must be a positive number'}), 400
         text_overlay = data.get('text_overlay')
         filters = data.get('filters')
         format_type = data.get('format', 'tiktok')
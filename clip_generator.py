@@ -3,6 +3,8 @@ AI-Powered Clip Generator for Twitch/YouTube to TikTok/YouTube Shorts
 Automatically finds engaging moments and creates viral-ready clips
 """
 
+from __future__ import annotations
+
 import os
 import sys
 
@@ -12,59 +14,212 @@ if sys.platform == 'win32':
         sys.stdout.reconfigure(encoding='utf-8')
     except:
         pass
+import atexit
+import importlib.util
 import json
+import math
+import queue
 import re
+import shutil
+import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import yt_dlp
-try:
-    # Try MoviePy 2.x imports first
-    from moviepy import VideoFileClip, TextClip, CompositeVideoClip, concatenate_videoclips, vfx
-    # MoviePy 2.x uses vfx.Resize and vfx.MultiplySpeed
-    Resize = vfx.Resize
-    MultiplySpeed = vfx.MultiplySpeed
-    # Check actual version to be sure
-    try:
-        import moviepy
-        version_str = getattr(moviepy, '__version__', '2.0.0')
-        major_version = int(version_str.split('.')[0])
-        MOVIEPY_VERSION = major_version if major_version >= 2 else 1
-    except:
-        MOVIEPY_VERSION = 2  # Assume 2.x if import succeeded
-except ImportError:
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+from dotenv import load_dotenv
+
+from json_utils import json_dumps, json_loads
+
+# MoviePy takes a second or two to import, so it is loaded on first use (see _load_moviepy)
+VideoFileClip = ImageClip = CompositeVideoClip = concatenate_videoclips = vfx = None
+Resize = MultiplySpeed = None
+MOVIEPY_VERSION = None
+
+
+def _load_moviepy():
+    """Import MoviePy on first use - handles both MoviePy 1.x and 2.x"""
+    global VideoFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips, vfx
+    global Resize, MultiplySpeed, MOVIEPY_VERSION
+    if MOVIEPY_VERSION is not None:
+        return
+    
     try:
-        # Fallback to MoviePy 1.x imports
-        from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip, concatenate_videoclips
+        # Try MoviePy 2.x imports first
+        from moviepy import VideoFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips, vfx
+        # MoviePy 2.x uses vfx.Resize and vfx.MultiplySpeed
+        Resize = vfx.Resize
+        MultiplySpeed = vfx.MultiplySpeed
+        # Check actual version to be sure
         try:
-            from moviepy.video.fx.all import resize, speedx
-            Resize = resize
-            MultiplySpeed = speedx
-        except ImportError:
-            from moviepy.video.fx import resize, speedx
-            Resize = resize
-            MultiplySpeed = speedx
-        MOVIEPY_VERSION = 1
+            import moviepy
+            version_str = getattr(moviepy, '__version__', '2.0.0')
+            major_version = int(version_str.split('.')[0])
+            MOVIEPY_VERSION = major_version if major_version >= 2 else 1
+        except:
+            MOVIEPY_VERSION = 2  # Assume 2.x if import succeeded
     except ImportError:
-        raise ImportError("MoviePy is not installed. Install with: pip install moviepy")
-from PIL import Image
-from dotenv import load_dotenv
+        try:
+            # Fallback to MoviePy 1.x imports
+            from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips
+            try:
+                from moviepy.video.fx.all import resize, speedx
+                Resize = resize
+                MultiplySpeed = speedx
+            except ImportError:
+                from moviepy.video.fx import resize, speedx
+                Resize = resize
+                MultiplySpeed = speedx
+            MOVIEPY_VERSION = 1
+        except ImportError:
+            raise ImportError("MoviePy is not installed. Install with: pip install moviepy")
 
-# Try to import OpenAI (optional)
-try:
+
+# OpenAI is optional and only imported once an API key is configured (see _load_openai)
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+OpenAI = None
+RateLimitError = Exception
+APIError = Exception
+APIConnectionError = Exception
+APITimeoutError = Exception
+
+
+def _load_openai():
+    """Import the OpenAI client and its error types"""
+    global OpenAI, RateLimitError, APIError, APIConnectionError, APITimeoutError
     from openai import OpenAI
     from openai import RateLimitError, APIError, APIConnectionError, APITimeoutError
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    RateLimitError = Exception
-    APIError = Exception
-    APIConnectionError = Exception
-    APITimeoutError = Exception
+
 
 load_dotenv()
 
+# Query parameters that only record where a link was shared from
+TRACKING_PARAMS = {'si', 'feature', 'fbclid', 'gclid', 'igshid', 'pp', 'ab_channel', 't'}
+
+# Subtitle lines that aren't spoken text: cue numbers, timestamp lines and tag-only lines
+SUBTITLE_CUE_RE = re.compile(r'^(?:\s*\d+\s*|.*-->.*|<.*)$', re.MULTILINE)
+
+# Rendered frames buffered between MoviePy and the encoder (~6 MB each at 1080x1920)
+FRAME_QUEUE_SIZE = 16
+
+
+@lru_cache(maxsize=64)
+def _build_filtergraph(src_width: int, src_height: int, target_width: int, target_height: int) -> str:
+    """
+    Build the ffmpeg crop+scale chain that center-crops to the target aspect ratio
+    
+    Memoized per source/target geometry: every clip cut from the same video into the
+    same format reuses the string, only the per-clip subtitle filter gets appended
+    """
+    target_aspect = target_width / target_height
+    if src_width / src_height > target_aspect:
+        # Source is wider, crop sides (center crop)
+        crop_width = int(src_height * target_aspect) // 2 * 2
+        crop_height = src_height // 2 * 2
+    else:
+        # Source is taller, crop top/bottom (center crop)
+        crop_width = src_width // 2 * 2
+        crop_height = int(src_width / target_aspect) // 2 * 2
+    x = (src_width - crop_width) // 2
+    y = (src_height - crop_height) // 2
+    return f"crop={crop_width}:{crop_height}:{x}:{y},scale={target_width}:{target_height},setsar=1"
+
+# A worker that hasn't answered within this long (plus WHISPER_SECONDS_PER_AUDIO_SECOND
+# for each second of audio in the request) is considered hung and gets killed; the clock
+# starts once the worker has loaded its model
+WHISPER_TIMEOUT_BASE = 300
+WHISPER_SECONDS_PER_AUDIO_SECOND = 2
+
+
+class _WhisperWorker:
+    """Long-lived whisper_worker.py subprocess that keeps the model resident between calls"""
+    
+    def __init__(self, model_name: str = "base"):
+        worker_script = Path(__file__).with_name("whisper_worker.py")
+        # The worker exits on its own when our end of stdin is closed
+        self.process = subprocess.Popen(
+            [sys.executable, str(worker_script), model_name],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding='utf-8'
+        )
+        self._lock = threading.Lock()
+        
+        # Pipes can't be polled with a timeout on Windows, so a thread reads the responses
+        # and transcribe() waits on the queue with a deadline instead
+        self._responses: "queue.Queue[str]" = queue.Queue()
+        # Set by the worker's ready line, once the model is loaded (or the load failed)
+        self._ready = threading.Event()
+        threading.Thread(target=self._read_responses, daemon=True).start()
+    
+    def _read_responses(self):
+        for line in self.process.stdout:
+            if not self._ready.is_set():
+                self._ready.set()
+                continue
+            self._responses.put(line)
+        # EOF: the worker exited
+        self._ready.set()
+        self._responses.put("")
+    
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+    
+    def transcribe(self, video_path: str, ranges: List[Tuple[float, float]], language: str = "en") -> List[List[Dict]]:
+        """Send a batch of time ranges of one file to the worker and wait for their segments"""
+        sources = [{"path": video_path, "start": start, "end": end} for start, end in ranges]
+        request = json.dumps({"sources": sources, "language": language})
+        timeout = WHISPER_TIMEOUT_BASE + WHISPER_SECONDS_PER_AUDIO_SECOND * sum(end - start for start, end in ranges)
+        # One request in flight at a time; the model serves them sequentially anyway
+        with self._lock:
+            # Loading (and on a cold cache downloading) the model can take any amount of time
+            self._ready.wait()
+            if not self.is_alive():
+                raise RuntimeError("Whisper worker is not running")
+            self.process.stdin.write(request + "\n")
+            self.process.stdin.flush()
+            try:
+                line = self._responses.get(timeout=timeout)
+            except queue.Empty:
+                # A late answer would be read as the reply to the next request; the next
+                # transcription starts a fresh worker instead
+                self.process.kill()
+                self.process.wait()
+                raise RuntimeError(f"Whisper worker did not answer within {timeout:.0f}s, restarting it")
+        
+        if not line:
+            raise RuntimeError("Whisper worker exited unexpectedly")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        
+        results = []
+        for result in response["results"]:
+            if "error" in result:
+                print(f"⚠️  Transcription failed: {result['error']}")
+            results.append(result.get("segments", []))
+        return results
+    
+    def close(self):
+        """Stop the worker process"""
+        if self.is_alive():
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
 class ClipGenerator:
+    # Loaded fonts keyed by size, shared by every generator instance
+    _font_cache: Dict[int, ImageFont.FreeTypeFont] = {}
+    
     def __init__(self, config_path: str = "config.json"):
         """Initialize the clip generator with configuration"""
         with open(config_path, 'r') as f:
@@ -76,6 +231,7 @@ class ClipGenerator:
         self.openai_enabled = False
         if self.openai_key and OPENAI_AVAILABLE:
             try:
+                _load_openai()
                 self.openai_client = OpenAI(
                     api_key=self.openai_key,
                     timeout=60.0,  # 60 second timeout
@@ -103,26 +259,83 @@ class ClipGenerator:
         self.cache_enabled = self.config.get("cache", {}).get("enabled", True)
         self.cache_max_size_gb = self.config.get("cache", {}).get("max_size_gb", 10)
         self.cache_max_age_days = self.config.get("cache", {}).get("max_age_days", 30)
+        
+        # Whisper model is loaded once in a worker process, on first use. With captions on and
+        # captions.preload_model set, start it now so it loads while the video downloads
+        # (off by default: app.py builds a generator at import time, e.g. in every reloader process)
+        self._whisper_worker = None
+        self._whisper_lock = threading.Lock()
+        # Don't leave a model process (and its GPU memory) behind when the interpreter exits
+        atexit.register(self.close)
+        captions_config = self.config.get("captions", {})
+        if (captions_config.get("enabled", True) and captions_config.get("preload_model", False)
+                and (importlib.util.find_spec("faster_whisper") or importlib.util.find_spec("whisper"))):
+            try:
+                self._get_whisper_worker()
+            except OSError as e:
+                print(f"[WARNING] Could not start Whisper worker: {e}")
+        
+        # Known video durations by path (from download/cache metadata or ffprobe)
+        self._durations: Dict[str, float] = {}
+        
+        # Cache entries already validated in this process: cache key -> (path, metadata)
+        self._cache_index: Dict[str, Tuple[str, Dict]] = {}
+        
+        # GPU decode/encode for the ffmpeg re-encode path (detected once)
+        self.nvenc_available = self._detect_nvenc()
+        if self.nvenc_available:
+            print("[OK] NVIDIA GPU encoding (h264_nvenc) available")
+    
+    def _canonicalize_url(self, url: str) -> str:
+        """Strip tracking params/fragments so share links map to the same cache entry"""
+        from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+        parts = urlsplit(url.strip())
+        query = [
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+        ]
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ''))
     
     def _get_cache_key(self, url: str) -> str:
         """Generate cache key from URL"""
         import hashlib
-        return hashlib.md5(url.encode()).hexdigest()
+        return hashlib.blake2b(self._canonicalize_url(url).encode(), digest_size=16).hexdigest()
     
-    def _get_cached_video(self, url: str) -> Optional[str]:
+    def _get_video_cache_key(self, info: Dict) -> Optional[str]:
+        """Generate cache key from the extractor's video id (same video, any URL)"""
+        if not info.get('id'):
+            return None
+        import hashlib
+        video_id = f"{info.get('extractor_key', 'generic')}:{info['id']}"
+        return hashlib.blake2b(video_id.encode(), digest_size=16).hexdigest()
+    
+    def _get_cached_video(self, url: str, cache_key: Optional[str] = None) -> Optional[str]:
         """Check if video is cached and return path if valid"""
         if not self.cache_enabled:
             return None
         
-        cache_key = self._get_cache_key(url)
+        cache_key = cache_key or self._get_cache_key(url)
         cache_file = self.cache_dir / f"{cache_key}.mp4"
         cache_meta = self.cache_dir / f"{cache_key}.json"
         
+        # Entries seen before skip the metadata read; only expiry and existence are rechecked
+        indexed = self._cache_index.get(cache_key)
+        if indexed is not None:
+            from datetime import datetime
+            path, meta = indexed
+            age = datetime.now() - datetime.fromisoformat(meta.get('cached_at', ''))
+            if age.days <= self.cache_max_age_days and os.path.exists(path):
+                print(f"💾 Using cached video: {meta.get('title', 'Unknown')}")
+                os.utime(path)
+                return path
+            # Expired or removed: fall through so the disk check below cleans it up
+            del self._cache_index[cache_key]
+        
         if cache_file.exists() and cache_meta.exists():
             try:
                 # Check cache metadata
-                with open(cache_meta, 'r') as f:
-                    meta = json.load(f)
+                with open(cache_meta, 'r', encoding='utf-8') as f:
+                    meta = json_loads(f.read())
                 
                 # Check if cache is expired
                 from datetime import datetime, timedelta
@@ -138,6 +351,13 @@ class ClipGenerator:
                 # Verify file exists and is valid
                 if cache_file.stat().st_size > 0:
                     print(f"💾 Using cached video: {meta.get('title', 'Unknown')}")
+                    # Record the hit for eviction (atime alone is unreliable on noatime mounts)
+                    os.utime(cache_file)
+                    if meta.get('duration'):
+                        self._durations[str(cache_file)] = float(meta['duration'])
+                    self._cache_index[cache_key] = (str(cache_file), meta)
+                    # Let repeat lookups of this exact URL skip the network probe
+                    self._cache_index[self._get_cache_key(url)] = (str(cache_file), meta)
                     return str(cache_file)
                 else:
                     # Corrupted cache, remove it
@@ -149,20 +369,29 @@ class ClipGenerator:
         
         return None
     
-    def _save_to_cache(self, url: str, video_path: str, video_info: Dict):
+    def _save_to_cache(self, url: str, video_path: str, video_info: Dict, cache_key: Optional[str] = None):
         """Save downloaded video to cache"""
         if not self.cache_enabled:
             return
         
         try:
-            cache_key = self._get_cache_key(url)
+            cache_key = cache_key or self._get_cache_key(url)
             cache_file = self.cache_dir / f"{cache_key}.mp4"
             cache_meta = self.cache_dir / f"{cache_key}.json"
             
-            # Copy file to cache (or move if from downloads)
-            import shutil
-            if video_path != str(cache_file):
-                shutil.copy2(video_path, cache_file)
+            # Hardlink the download into the cache (no extra bytes written), copying only
+            # across filesystems. Write to a .part file first so an interrupted copy is
+            # never served as a cache hit
+            already_cached = cache_file.exists() and os.path.samefile(video_path, cache_file)
+            if not already_cached:
+                partial_file = self.cache_dir / f"{cache_key}.mp4.part"
+                if partial_file.exists():
+                    partial_file.unlink()
+                try:
+                    os.link(video_path, partial_file)
+                except OSError:
+                    shutil.copy2(video_path, partial_file)
+                os.replace(partial_file, cache_file)
             
             # Save metadata
             from datetime import datetime
@@ -174,8 +403,12 @@ class ClipGenerator:
                 'size': cache_file.stat().st_size
             }
             
-            with open(cache_meta, 'w') as f:
-                json.dump(metadata, f)
+            partial_meta = self.cache_dir / f"{cache_key}.json.part"
+            with open(partial_meta, 'w', encoding='utf-8') as f:
+                f.write(json_dumps(metadata))
+            os.replace(partial_meta, cache_meta)
+            self._cache_index[cache_key] = (str(cache_file), metadata)
+            self._cache_index[self._get_cache_key(url)] = (str(cache_file), metadata)
             
             # Clean up old cache if needed
             self._cleanup_cache()
@@ -197,16 +430,23 @@ class ClipGenerator:
             if total_size > max_size_bytes:
                 print(f"🧹 Cache size ({total_size / (1024**3):.2f} GB) exceeds limit ({self.cache_max_size_gb} GB), cleaning up...")
                 
-                # Sort by modification time (oldest first)
-                cache_files.sort(key=lambda f: f.stat().st_mtime)
+                # Evict by size-weighted idle time: large files that haven't been used
+                # for a while go first, small or recently used ones last
+                now = time.time()
+                def eviction_score(f):
+                    stat = f.stat()
+                    last_used = max(stat.st_atime, stat.st_mtime)
+                    return (now - last_used) * stat.st_size
+                cache_files.sort(key=eviction_score, reverse=True)
                 
-                # Remove oldest files until under limit
+                # Remove files until under limit
                 for cache_file in cache_files:
                     if total_size <= max_size_bytes * 0.9:  # Clean to 90% of limit
                         break
                     
                     cache_key = cache_file.stem
                     meta_file = self.cache_dir / f"{cache_key}.json"
+                    self._cache_index.pop(cache_key, None)
                     
                     file_size = cache_file.stat().st_size
                     cache_file.unlink()
@@ -226,18 +466,33 @@ class ClipGenerator:
         if cached_path:
             return cached_path
         
-        print(f"📥 Downloading video from: {url}")
-        
         ydl_opts = {
             'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
             'outtmpl': str(self.downloads_dir / '%(title)s.%(ext)s'),
             'quiet': False,
             'no_warnings': False,
+            # Fetch HLS/DASH fragments in parallel when using the native downloader
+            'concurrent_fragment_downloads': 8,
         }
         
+        # Use aria2c for multi-connection downloads when it is installed
+        if shutil.which('aria2c'):
+            ydl_opts['external_downloader'] = {'default': 'aria2c'}
+            ydl_opts['external_downloader_args'] = {'aria2c': ['-x', '16', '-s', '16', '-k', '1M']}
+        
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
+                # Probe first: the same video behind a different URL (share links, playlist
+                # links, mirrors) resolves to the same id and is served from the cache
+                info = ydl.extract_info(url, download=False)
+                video_key = self._get_video_cache_key(info)
+                if video_key:
+                    cached_path = self._get_cached_video(url, cache_key=video_key)
+                    if cached_path:
+                        return cached_path
+                
+                print(f"📥 Downloading video from: {url}")
+                info = ydl.process_ie_result(info, download=True)
                 filename = ydl.prepare_filename(info)
                 # Ensure .mp4 extension
                 if not filename.endswith('.mp4'):
@@ -251,7 +506,9 @@ class ClipGenerator:
                     'title': info.get('title', 'Unknown'),
                     'duration': info.get('duration', 0)
                 }
-                self._save_to_cache(url, filename, video_info)
+                self._save_to_cache(url, filename, video_info, cache_key=video_key)
+                if video_info['duration']:
+                    self._durations[filename] = float(video_info['duration'])
                 
                 print(f"✅ Downloaded: {filename}")
                 return filename
@@ -275,28 +532,44 @@ class ClipGenerator:
                 subtitles = info.get('subtitles', {}) or info.get('automatic_captions', {})
                 if 'en' in subtitles:
                     subtitle_url = subtitles['en'][0]['url']
-                    import requests
-                    response = requests.get(subtitle_url)
-                    if response.status_code == 200:
+                    # Fetch through yt-dlp's own HTTP handler: it reuses the connection and
+                    # cookies/headers from the info request (HTTP errors raise)
+                    with ydl.urlopen(subtitle_url) as response:
                         # Parse WebVTT or SRT format (simplified)
-                        text = response.text
-                        # Remove timestamps and formatting
-                        lines = text.split('\n')
-                        transcript_lines = []
-                        for line in lines:
-                            if line and not line.startswith('<') and '-->' not in line and not line.strip().isdigit():
-                                transcript_lines.append(line.strip())
-                        return ' '.join(transcript_lines)
+                        text = response.read().decode('utf-8', errors='replace')
+                    # Remove timestamps and formatting in one regex pass
+                    return ' '.join(SUBTITLE_CUE_RE.sub('', text).split())
         except Exception as e:
             print(f"âš ï¸ Could not extract transcript: {e}")
         
         return None
     
+    def _get_video_duration(self, video_path: str) -> float:
+        """Get a video's duration, probing the file only if it isn't already known"""
+        duration = self._durations.get(video_path)
+        if duration:
+            return duration
+        
+        try:
+            output = subprocess.check_output(
+                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                 '-of', 'default=nw=1:nk=1', video_path],
+                text=True, timeout=30
+            )
+            duration = float(output.strip())
+        except (OSError, ValueError, subprocess.SubprocessError):
+            # ffprobe missing or unhelpful: let MoviePy read the header instead
+            _load_moviepy()
+            clip = VideoFileClip(video_path)
+            duration = clip.duration
+            clip.close()
+        
+        self._durations[video_path] = duration
+        return duration
+    
     def find_engaging_clips_ai(self, video_path: str, transcript: Optional[str] = None) -> List[Dict]:
         """Use AI to find the most engaging moments in the video"""
-        clip = VideoFileClip(video_path)
-        duration = clip.duration
-        clip.close()
+        duration = self._get_video_duration(video_path)
         
         # If we have OpenAI API, use it for intelligent clip detection
         if self.openai_enabled and self.openai_client:
@@ -312,18 +585,43 @@ class ClipGenerator:
                 print("💡 Using heuristic detection (add OpenAI API key to .env for AI-powered clip detection)")
             return self._heuristic_clip_detection(video_path, duration)
     
+    def _truncate_transcript(self, transcript: str) -> str:
+        """Cut the transcript to the configured token budget for the AI model"""
+        budget = self.config["ai_settings"].get("transcript_token_budget", 3000)
+        try:
+            import tiktoken
+            model = self.config["ai_settings"]["model"]
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                # Newer model names may not be registered yet
+                encoding = tiktoken.get_encoding("o200k_base")
+            tokens = encoding.encode(transcript)
+            if len(tokens) <= budget:
+                return transcript
+            print(f"📝 Transcript truncated to {budget} tokens for API efficiency")
+            return encoding.decode(tokens[:budget]) + "..."
+        except ImportError:
+            # Without tiktoken, approximate with ~4 characters per token
+            max_transcript_length = budget * 4
+            if len(transcript) <= max_transcript_length:
+                return transcript
+            print(f"📝 Transcript truncated to {max_transcript_length} characters for API efficiency")
+            return transcript[:max_transcript_length] + "..."
+    
     def _ai_clip_detection(self, video_path: str, transcript: str, duration: float) -> List[Dict]:
         """Use OpenAI to intelligently find engaging clips"""
+        # Run the heuristic fallback while waiting on the API so it is ready if the AI fails;
+        # stop_heuristic kills its ffmpeg decode once the AI result is in
+        stop_heuristic = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=1)
+        heuristic_future = executor.submit(self._heuristic_clip_detection, video_path, duration, stop_heuristic)
         try:
             max_retries = 3
             retry_delay = 2
             
             # Truncate transcript if too long (keep it under token limits)
-            max_transcript_length = 4000  # characters
-            transcript_to_use = transcript
-            if len(transcript_to_use) > max_transcript_length:
-                transcript_to_use = transcript_to_use[:max_transcript_length] + "..."
-                print(f"📝 Transcript truncated to {max_transcript_length} characters for API efficiency")
+            transcript_to_use = self._truncate_transcript(transcript)
             
             for attempt in range(max_retries):
                 try:
@@ -374,17 +672,28 @@ Requirements:
                     else:
                         print("🔄 Sending request to OpenAI...")
                     
-                    response = self.openai_client.chat.completions.create(
+                    stream = self.openai_client.chat.completions.create(
                         model=self.config["ai_settings"]["model"],
                         messages=[
                             {"role": "system", "content": system_prompt},
                             {"role": "user", "content": user_prompt}
                         ],
-                        temperature=self.config["ai_settings"]["temperature"]
+                        temperature=self.config["ai_settings"]["temperature"],
+                        stream=True,
+                        stream_options={"include_usage": True}
                     )
                     
+                    # Collect the streamed response; the final chunk carries token usage
+                    parts = []
+                    response = None
+                    for chunk in stream:
+                        if chunk.choices:
+                            parts.append(chunk.choices[0].delta.content or "")
+                        if getattr(chunk, "usage", None):
+                            response = chunk
+                    
                     # Extract and parse response
-                    content = response.choices[0].message.content.strip()
+                    content = "".join(parts).strip()
                     
                     # Handle different response formats
                     if content.startswith("```"):
@@ -398,12 +707,12 @@ Requirements:
                     
                     # Try to parse as JSON
                     try:
-                        clips_data = json.loads(content)
+                        clips_data = json_loads(content)
                     except json.JSONDecodeError:
                         # Try to extract JSON from text
                         json_match = re.search(r'\[.*\]', content, re.DOTALL)
                         if json_match:
-                            clips_data = json.loads(json_match.group())
+                            clips_data = json_loads(json_match.group())
                         else:
                             raise ValueError("Could not extract JSON from response")
                     
@@ -458,11 +767,14 @@ Requirements:
                     if valid_clips:
                         print(f"✅ AI found {len(valid_clips)} engaging clips!")
                         # Show estimated cost
-                        self._estimate_cost(response)
+                        if response is not None:
+                            self._estimate_cost(response)
+                        stop_heuristic.set()
+                        heuristic_future.cancel()
                         return valid_clips
                     else:
                         print("⚠️  AI returned no valid clips, using heuristics...")
-                        return self._heuristic_clip_detection(video_path, duration)
+                        return heuristic_future.result()
                         
                 except RateLimitError as e:
                     wait_time = retry_delay * (2 ** attempt)
@@ -471,7 +783,7 @@ Requirements:
                         time.sleep(wait_time)
                     else:
                         print(f"❌ Rate limit exceeded after {max_retries} attempts. Using heuristics...")
-                        return self._heuristic_clip_detection(video_path, duration)
+                        return heuristic_future.result()
                         
                 except (APIConnectionError, APITimeoutError) as e:
                     wait_time = retry_delay * (2 ** attempt)
@@ -480,7 +792,7 @@ Requirements:
                         time.sleep(wait_time)
                     else:
                         print(f"❌ Connection failed after {max_retries} attempts. Using heuristics...")
-                        return self._heuristic_clip_detection(video_path, duration)
+                        return heuristic_future.result()
                         
                 except APIError as e:
                     error_msg = str(e)
@@ -489,7 +801,7 @@ Requirements:
                         print("💡 Check your OpenAI account billing and credits")
                     else:
                         print(f"❌ OpenAI API error: {e}")
-                    return self._heuristic_clip_detection(video_path, duration)
+                    return heuristic_future.result()
                     
                 except (json.JSONDecodeError, ValueError) as e:
                     print(f"⚠️  Failed to parse AI response: {e}")
@@ -498,14 +810,16 @@ Requirements:
                         time.sleep(retry_delay)
                     else:
                         print("❌ Could not parse AI response after retries. Using heuristics...")
-                        return self._heuristic_clip_detection(video_path, duration)
+                        return heuristic_future.result()
             
             # If all retries failed
-            return self._heuristic_clip_detection(video_path, duration)
+            return heuristic_future.result()
             
         except Exception as e:
             print(f"âš ï¸ AI detection failed, using heuristics: {e}")
-            return self._heuristic_clip_detection(video_path, duration)
+            return heuristic_future.result()
+        finally:
+            executor.shutdown(wait=False)
     
     def _estimate_cost(self, response) -> None:
         """Estimate and display API cost"""
@@ -544,20 +858,51 @@ Requirements:
         except Exception:
             pass  # Silently fail cost estimation
     
-    def _analyze_audio_engagement(self, video_path: str, duration: float) -> List[Tuple[float, float]]:
-        """Analyze audio to find engaging moments (volume spikes, energy peaks)"""
+    def _analyze_audio_engagement(self, video_path: str, duration: float,
+                                  stop: Optional[threading.Event] = None) -> List[Tuple[float, float]]:
+        """Analyze audio to find engaging moments (volume spikes, energy peaks); setting stop aborts it"""
         try:
-            import librosa
-            import numpy as np
-            
             print("🎵 Analyzing audio for engagement peaks...")
             
-            # Load audio
-            y, sr = librosa.load(video_path, duration=duration)
+            # Stream mono 16-bit PCM from ffmpeg and reduce it to per-hop energies as it
+            # arrives, so the whole soundtrack is never held in memory
+            sample_rate = 16000
+            hop_length = 512
+            hops_per_frame = 4  # 2048-sample analysis window
+            hop_bytes = hop_length * 2
+            command = [
+                'ffmpeg', '-v', 'error', '-t', f"{duration:.3f}", '-i', video_path,
+                '-vn', '-ac', '1', '-ar', str(sample_rate), '-f', 's16le', '-'
+            ]
+            hop_energies = []
+            with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as process:
+                leftover = b""
+                while True:
+                    if stop is not None and stop.is_set():
+                        # Nobody needs the result any more; don't keep decoding the soundtrack
+                        process.kill()
+                        return []
+                    data = process.stdout.read(hop_bytes * 1024)
+                    if not data:
+                        break
+                    data = leftover + data
+                    usable = len(data) - len(data) % hop_bytes
+                    leftover = data[usable:]
+                    hops = np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32).reshape(-1, hop_length)
+                    hop_energies.append(np.einsum('ij,ij->i', hops, hops))
+            
+            if process.returncode != 0:
+                raise RuntimeError(f"ffmpeg could not decode audio (exit code {process.returncode})")
+            if not hop_energies:
+                return []
+            energy = np.concatenate(hop_energies)
+            if len(energy) < hops_per_frame:
+                return []
             
-            # Calculate RMS energy (volume)
-            rms = librosa.feature.rms(y=y)[0]
-            times = librosa.frames_to_time(np.arange(len(rms)), sr=sr)
+            # Calculate RMS energy (volume) over overlapping windows, normalized to 0..1
+            window_energy = np.convolve(energy, np.ones(hops_per_frame, dtype=np.float32), mode='valid')
+            rms = np.sqrt(window_energy / (hop_length * hops_per_frame)) / 32768.0
+            times = (np.arange(len(rms)) * hop_length + hop_length * hops_per_frame / 2) / sample_rate
             
             # Find volume spikes (potential exciting moments)
             rms_mean = np.mean(rms)
@@ -565,23 +910,22 @@ Requirements:
             threshold = rms_mean + (rms_std * 1.5)  # Moments above 1.5 std dev
             
             # Find peaks
-            peaks = []
-            for i, energy in enumerate(rms):
-                if energy > threshold and times[i] < duration:
-                    peaks.append((times[i], energy))
+            peak_indices = np.nonzero((rms > threshold) & (times < duration))[0]
+            if len(peak_indices) == 0:
+                return []
             
-            # Sort by energy and return top moments
-            peaks.sort(key=lambda x: x[1], reverse=True)
-            return [time for time, _ in peaks[:10]]  # Top 10 moments
+            # Select the top 10 moments without sorting every peak, then order them by energy
+            top_count = min(10, len(peak_indices))
+            top = peak_indices[np.argpartition(-rms[peak_indices], top_count - 1)[:top_count]]
+            top = top[np.argsort(-rms[top])]
+            return times[top].tolist()
             
-        except ImportError:
-            print("⚠️  librosa not installed. Install with: pip install librosa")
-            return []
         except Exception as e:
             print(f"⚠️  Audio analysis failed: {e}")
             return []
     
-    def _heuristic_clip_detection(self, video_path: str, duration: float) -> List[Dict]:
+    def _heuristic_clip_detection(self, video_path: str, duration: float,
+                                  stop: Optional[threading.Event] = None) -> List[Dict]:
         """Fallback: Use heuristics to find potential clips, enhanced with audio analysis"""
         clips = []
         min_duration = self.config["clip_settings"]["min_duration"]
@@ -589,7 +933,7 @@ Requirements:
         preferred_duration = self.config["clip_settings"]["preferred_duration"]
         
         # Try audio analysis first
-        audio_peaks = self._analyze_audio_engagement(video_path, duration)
+        audio_peaks = self._analyze_audio_engagement(video_path, duration, stop)
         
         if audio_peaks:
             # Use audio peaks as clip starting points
@@ -626,65 +970,83 @@ Requirements:
         return clips
     
     def create_clip(self, video_path: str, start_time: float, end_time: float, 
-                   output_path: str, format_type: str = "tiktok", clip_title: str = None) -> bool:
-        """Create a formatted clip for TikTok or YouTube Shorts"""
+                   output_path: str, format_type: str = "tiktok", clip_title: str = None,
+                   source_info: Optional[Dict] = None,
+                   segments: Optional[List[Dict]] = None, encoder_threads: int = 0) -> bool:
+        """
+        Create a formatted clip for TikTok or YouTube Shorts
+        
+        Args:
+            source_info: _source_info() of video_path, so clips from the same video don't
+                probe it again (probed here if not given)
+            segments: Caption segments relative to the subclip (transcribed if not given)
+            encoder_threads: x264 threads (0 = one pool sized to the whole machine)
+        """
         print(f"âœ‚ï¸ Creating {format_type} clip: {start_time}s - {end_time}s")
         
+        subtitle_path = None
         try:
-            # Load video
-            full_clip = VideoFileClip(video_path)
-            # Try to extract subclip - handle both MoviePy 1.x and 2.x
-            # Try slicing first (MoviePy 2.x), then fallback to subclip (MoviePy 1.x)
-            clip = None
-            try:
-                # MoviePy 2.x uses slicing syntax
-                clip = full_clip[start_time:end_time]
-            except (TypeError, AttributeError, NotImplementedError, IndexError):
-                # Fallback to subclip method (MoviePy 1.x)
-                try:
-                    if hasattr(full_clip, 'subclip'):
-                        clip = full_clip.subclip(start_time, end_time)
-                    else:
-                        raise AttributeError("Neither slicing nor subclip available")
-                except Exception as e:
-                    raise AttributeError(f"Could not extract subclip: {e}")
-            
-            if clip is None:
-                raise ValueError("Failed to extract subclip from video")
+            # Only the size and duration are needed here; ffmpeg does all the decoding
+            if source_info is None:
+                source_info = self._source_info(video_path)
+            width, height = source_info["width"], source_info["height"]
+            end_time = min(end_time, source_info["duration"])
+            clip_duration = end_time - start_time
+            if clip_duration <= 0:
+                raise ValueError(f"Clip starts after the end of the video ({source_info['duration']:.1f}s)")
             
             # Get format settings
             format_config = self.config["output_formats"][format_type]
             target_width = format_config["width"]
             target_height = format_config["height"]
             
-            # Resize to vertical format (9:16 aspect ratio)
-            clip = self._resize_to_vertical(clip, target_width, target_height)
+            # Transcribe the unmodified subclip so segments can be shared between formats
+            captions_enabled = self.config.get("captions", {}).get("enabled", True)
+            if captions_enabled and segments is None:
+                segments = self._transcribe_clip_audio(video_path, start_time, end_time)
             
-            # Speed up if needed to fit duration
+            # Source already is the target format and nothing has to be drawn on it:
+            # cut the range with a stream copy instead of decoding and re-encoding
             max_duration = format_config["duration_max"]
-            if clip.duration > max_duration:
-                speed_factor = clip.duration / max_duration
-                if MOVIEPY_VERSION == 2:
-                    clip = clip.fx(MultiplySpeed, speed_factor)
-                else:
-                    clip = MultiplySpeed(clip, speed_factor)
-                print(f"âš¡ Sped up by {speed_factor:.2f}x to fit duration")
-            
-            # Add engaging elements (including captions if enabled)
-            clip = self._add_engaging_elements(clip, format_type, clip_title, add_captions=True)
-            
-            # Write output
-            clip.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac',
-                fps=format_config["fps"],
-                preset='medium',
-                bitrate='8000k'
-            )
+            stream_copied = False
+            if ((width, height) == (target_width, target_height) and clip_duration <= max_duration
+                    and not clip_title and not (captions_enabled and segments)
+                    and self._can_stream_copy(video_path, source_info, format_config["fps"], start_time)):
+                stream_copied = self._ffmpeg_stream_copy(video_path, start_time, end_time, output_path)
+            
+            if not stream_copied:
+                # Crop/resize to vertical format (9:16) is done by ffmpeg's filtergraph at encode
+                # time, so MoviePy never touches pixels here
+                vf_filters = [_build_filtergraph(width, height, target_width, target_height)]
+                
+                # Speed up if needed to fit duration (setpts/atempo in the same ffmpeg pass)
+                speed_factor = 1.0
+                if clip_duration > max_duration:
+                    speed_factor = clip_duration / max_duration
+                    print(f"âš¡ Sped up by {speed_factor:.2f}x to fit duration")
+                    if segments:
+                        segments = [
+                            {**segment, "start": segment["start"] / speed_factor, "end": segment["end"] / speed_factor}
+                            for segment in segments
+                        ]
+                
+                # Captions and the title card are burned in by ffmpeg from a sidecar subtitle file
+                subtitle_path = self._write_subtitles(
+                    segments if captions_enabled else None, output_path, target_width, target_height,
+                    title=clip_title, title_duration=min(2, clip_duration / speed_factor)
+                )
+                if subtitle_path:
+                    vf_filters.append(f"ass={self._ffmpeg_filter_path(subtitle_path)}")
+                
+                # Write output
+                self._ffmpeg_reencode(
+                    video_path, start_time, end_time, output_path, vf_filters,
+                    fps=format_config["fps"], speed_factor=speed_factor, threads=encoder_threads
+                )
             
-            # Generate thumbnail (before closing clip)
-            self._generate_thumbnail(clip, output_path)
+            # Generate thumbnail from the written file so it shows the final framing
+            output_duration = clip_duration if stream_copied else clip_duration / speed_factor
+            self._generate_thumbnail(output_path, output_duration)
             
             print(f"âœ… Created: {output_path}")
             return True
@@ -692,6 +1054,254 @@ Requirements:
         except Exception as e:
             print(f"âŒ Error creating clip: {e}")
             return False
+        finally:
+            # Captions are burned into the video, the sidecar is no longer needed
+            if subtitle_path and os.path.exists(subtitle_path):
+                try:
+                    os.unlink(subtitle_path)
+                except OSError:
+                    pass
+    
+    def _can_stream_copy(self, video_path: str, source_info: Dict, fps: int, start_time: float) -> bool:
+        """
+        Whether a copied range of the source matches what a re-encode would produce
+        
+        The stream must already be H.264/yuv420p at the output frame rate, and the cut has
+        to start on a keyframe (otherwise the copy opens with a frozen or black lead-in)
+        """
+        try:
+            if (source_info.get("codec_name") != "h264" or source_info.get("pix_fmt") != "yuv420p"
+                    or Fraction(source_info.get("r_frame_rate", "0/1")) != fps):
+                return False
+        except (ValueError, ZeroDivisionError):
+            return False
+        
+        # Keyframe timestamps from the keyframe at/before start_time up to one frame after it
+        try:
+            output = subprocess.check_output(
+                ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-skip_frame', 'nokey',
+                 '-read_intervals', f"{start_time:.3f}%+{1 / fps:.3f}",
+                 '-show_entries', 'frame=best_effort_timestamp_time', '-of', 'csv=p=0', video_path],
+                text=True, timeout=30
+            )
+            fields = [line.split(',')[0] for line in output.split()]
+            keyframes = [float(field) for field in fields if field and field != 'N/A']
+        except (OSError, ValueError, subprocess.SubprocessError):
+            return False
+        return any(abs(keyframe - start_time) <= 0.5 / fps for keyframe in keyframes)
+    
+    def _source_info(self, video_path: str) -> Dict:
+        """Displayed size and duration of a video: ffprobe, or MoviePy if that fails"""
+        probe = self._probe_video_stream(video_path)
+        if probe:
+            return probe
+        _load_moviepy()
+        clip = VideoFileClip(video_path)
+        try:
+            return {"width": clip.w, "height": clip.h, "duration": clip.duration}
+        finally:
+            clip.close()
+    
+    def _detect_nvenc(self) -> bool:
+        """Check whether ffmpeg can decode with CUDA and encode with NVENC on this machine"""
+        if not self.config.get("hardware_acceleration", {}).get("enabled", True):
+            return False
+        try:
+            hwaccels = subprocess.run(
+                ['ffmpeg', '-hide_banner', '-hwaccels'],
+                capture_output=True, text=True, timeout=15
+            )
+            if 'cuda' not in hwaccels.stdout.split():
+                return False
+            # An encoder can be compiled in without a usable GPU, so try a tiny encode
+            probe = subprocess.run(
+                ['ffmpeg', '-hide_banner', '-loglevel', 'error',
+                 '-f', 'lavfi', '-i', 'color=size=256x256:duration=0.1',
+                 '-c:v', 'h264_nvenc', '-f', 'null', '-'],
+                capture_output=True, text=True, timeout=15
+            )
+            return probe.returncode == 0
+        except (OSError, subprocess.SubprocessError):
+            return False
+    
+    def _video_encoder(self, threads: int = 0) -> Tuple[str, str, List[str]]:
+        """
+        Codec, preset and extra ffmpeg params for re-encoding (NVENC when available)
+        
+        Callers add -pix_fmt yuv420p themselves, which also keeps NVENC from picking a
+        4:4:4 profile for RGB input. threads limits x264's pool when several encodes run
+        at once (0 lets x264 size it to the whole machine).
+        """
+        if self.nvenc_available:
+            return 'h264_nvenc', 'p4', ['-tune', 'hq', '-rc', 'vbr']
+        # Frame (not slice) threading
+        return 'libx264', 'faster', ['-threads', str(threads), '-x264-params', 'sliced-threads=0:rc-lookahead=20']
+    
+    @staticmethod
+    def _atempo_chain(speed_factor: float) -> List[str]:
+        """Split a speed factor into atempo filters (each limited to 0.5-2.0)"""
+        # Halving/doubling never reaches the 0.5-2.0 range for these
+        if not math.isfinite(speed_factor) or speed_factor <= 0:
+            raise ValueError(f"Speed must be a positive number, got {speed_factor}")
+        filters = []
+        while speed_factor > 2.0:
+            filters.append("atempo=2.0")
+            speed_factor /= 2.0
+        while speed_factor < 0.5:
+            filters.append("atempo=0.5")
+            speed_factor /= 0.5
+        filters.append(f"atempo={speed_factor:.6f}")
+        return filters
+    
+    def _ffmpeg_reencode(self, video_path: str, start_time: float, end_time: float,
+                         output_path: str, vf_filters: List[str], fps: int = 30,
+                         speed_factor: float = 1.0, threads: int = 0):
+        """
+        Cut start_time..end_time and re-encode it through the given video filters
+        
+        Uses CUDA decode + h264_nvenc when available, libx264 otherwise. Filters run on
+        the CPU either way so the crop chain and libass subtitles work unchanged.
+        """
+        video_filters = list(vf_filters)
+        audio_filters = []
+        if speed_factor != 1.0:
+            # Retime before anything else so subtitles line up with the sped-up output
+            video_filters.insert(0, f"setpts=PTS/{speed_factor:.6f}")
+            audio_filters = self._atempo_chain(speed_factor)
+        video_filters.append(f"fps={fps}")
+        
+        command = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y']
+        if self.nvenc_available:
+            command += ['-hwaccel', 'cuda']
+        command += [
+            '-ss', f"{start_time:.3f}", '-t', f"{end_time - start_time:.3f}", '-i', video_path,
+            '-vf', ','.join(video_filters)
+        ]
+        if audio_filters:
+            command += ['-af', ','.join(audio_filters)]
+        codec, preset, encoder_params = self._video_encoder(threads)
+        command += ['-c:v', codec, '-preset', preset, *encoder_params, '-b:v', '8000k']
+        command += ['-pix_fmt', 'yuv420p', '-c:a', 'aac', '-movflags', '+faststart', output_path]
+        
+        try:
+            subprocess.run(command, check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"ffmpeg failed: {e.stderr.strip()}")
+    
+    def _ffmpeg_stream_copy(self, video_path: str, start_time: float, end_time: float,
+                            output_path: str) -> bool:
+        """Cut start_time..end_time without re-encoding (starts on the nearest keyframe)"""
+        command = [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+            '-ss', f"{start_time:.3f}", '-i', video_path, '-t', f"{end_time - start_time:.3f}",
+            '-c', 'copy', '-avoid_negative_ts', 'make_zero', '-movflags', '+faststart',
+            output_path
+        ]
+        try:
+            subprocess.run(command, check=True, capture_output=True, text=True)
+            print("⚡ Stream-copied without re-encoding")
+            return True
+        except (OSError, subprocess.CalledProcessError) as e:
+            details = getattr(e, 'stderr', None) or e
+            print(f"⚠️  Stream copy failed, re-encoding instead: {details}")
+            return False
+    
+    def _write_videofile_threaded(self, clip: VideoFileClip, output_path: str, fps: int,
+                                  vf_filters: Optional[List[str]] = None):
+        """
+        Encode a MoviePy clip with rendering, audio and video encoding running concurrently
+        
+        A render thread pulls composed frames (decode + every MoviePy effect) into a bounded
+        queue, this thread pipes them as raw RGB into ffmpeg, and the soundtrack is encoded
+        in a third thread. The two streams are muxed afterwards without re-encoding.
+        vf_filters (e.g. the crop/scale chain) are applied by ffmpeg to the piped frames.
+        """
+        width, height = clip.size
+        output = Path(output_path)
+        video_tmp = output.with_name(output.stem + ".video.mp4")
+        audio_tmp = output.with_name(output.stem + ".audio.m4a")
+        has_audio = clip.audio is not None
+        frames = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+        stop = threading.Event()
+        errors = []
+        
+        def put(item) -> bool:
+            # The bounded queue gives back-pressure; give up once the encoder side has stopped
+            while not stop.is_set():
+                try:
+                    frames.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def render():
+            try:
+                for frame in clip.iter_frames(fps=fps, dtype="uint8"):
+                    if not put(frame):
+                        return
+            except Exception as e:
+                errors.append(e)
+            put(None)
+        
+        def write_audio():
+            try:
+                clip.audio.write_audiofile(str(audio_tmp), fps=44100, codec='aac', bitrate='192k', logger=None)
+            except Exception as e:
+                errors.append(e)
+        
+        codec, preset, encoder_params = self._video_encoder()
+        command = [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{width}x{height}", '-r', str(fps), '-i', '-',
+            *(['-vf', ','.join(vf_filters)] if vf_filters else []),
+            '-an', '-c:v', codec, '-preset', preset, *encoder_params, '-b:v', '8000k',
+            '-pix_fmt', 'yuv420p', str(video_tmp)
+        ]
+        
+        threads = [threading.Thread(target=render, daemon=True)]
+        if has_audio:
+            threads.append(threading.Thread(target=write_audio, daemon=True))
+        try:
+            for thread in threads:
+                thread.start()
+            
+            encoder = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+            try:
+                while True:
+                    frame = frames.get()
+                    if frame is None:
+                        break
+                    encoder.stdin.write(np.ascontiguousarray(frame).data)
+            except BrokenPipeError:
+                pass  # ffmpeg exited early; its stderr explains why
+            finally:
+                stop.set()
+                encoder.stdin.close()
+                encoder_errors = encoder.stderr.read().decode(errors='replace').strip()
+                encoder.wait()
+            
+            for thread in threads:
+                thread.join()
+            if errors:
+                raise errors[0]
+            if encoder.returncode != 0:
+                raise RuntimeError(f"ffmpeg failed: {encoder_errors}")
+            
+            # Mux the two streams without re-encoding either of them
+            command = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y', '-i', str(video_tmp)]
+            if has_audio:
+                command += ['-i', str(audio_tmp), '-map', '0:v', '-map', '1:a', '-shortest']
+            command += ['-c', 'copy', '-movflags', '+faststart', output_path]
+            try:
+                subprocess.run(command, check=True, capture_output=True, text=True)
+            except subprocess.CalledProcessError as e:
+                raise RuntimeError(f"ffmpeg failed: {e.stderr.strip()}")
+        finally:
+            stop.set()
+            for tmp_path in (video_tmp, audio_tmp):
+                if tmp_path.exists():
+                    tmp_path.unlink()
     
     def _resize_to_vertical(self, clip: VideoFileClip, target_width: int, target_height: int) -> VideoFileClip:
         """Resize clip to vertical format, cropping intelligently"""
@@ -742,148 +1352,242 @@ Requirements:
             clip = Resize(clip, (target_width, target_height))
         return clip
     
-    def _transcribe_clip_audio(self, clip: VideoFileClip) -> List[Dict]:
+    def close(self):
+        """Stop the Whisper worker process, if one is running"""
+        with self._whisper_lock:
+            if self._whisper_worker is not None:
+                self._whisper_worker.close()
+                self._whisper_worker = None
+    
+    def _get_whisper_worker(self) -> "_WhisperWorker":
+        """Return the warm Whisper worker, (re)starting it if needed"""
+        with self._whisper_lock:
+            if self._whisper_worker is None or not self._whisper_worker.is_alive():
+                self._whisper_worker = _WhisperWorker("base")
+            return self._whisper_worker
+    
+    def _transcribe_clip_audio(self, video_path: str, start_time: float, end_time: float) -> List[Dict]:
         """Transcribe audio from clip using Whisper"""
+        return self._transcribe_clips_audio(video_path, [(start_time, end_time)])[0]
+    
+    def _transcribe_clips_audio(self, video_path: str, ranges: List[Tuple[float, float]]) -> List[List[Dict]]:
+        """Transcribe several time ranges of a video in one request to the Whisper worker (one result per range)"""
+        if not ranges:
+            return []
         try:
-            import whisper
-            
             # Check if captions are enabled
             if not self.config.get("captions", {}).get("enabled", True):
-                return []
+                return [[] for _ in ranges]
             
-            print("🎤 Transcribing audio for captions...")
+            # Whisper runs in the worker process; only check it is installed here
+            if importlib.util.find_spec("faster_whisper") is None and importlib.util.find_spec("whisper") is None:
+                raise ImportError("whisper")
             
-            # Extract audio to temporary file
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_audio:
-                clip.audio.write_audiofile(tmp_audio.name, logger=None, verbose=False)
-                audio_path = tmp_audio.name
+            print(f"🎤 Transcribing audio for captions ({len(ranges)} clip{'s' if len(ranges) != 1 else ''})...")
             
-            try:
-                # Load Whisper model (use base model for speed)
-                model = whisper.load_model("base")
-                
-                # Transcribe
-                result = model.transcribe(audio_path, language="en", task="transcribe")
-                
-                # Extract segments with timestamps
-                segments = []
-                for segment in result.get("segments", []):
-                    segments.append({
-                        "text": segment["text"].strip(),
-                        "start": segment["start"],
-                        "end": segment["end"]
-                    })
-                
-                # Clean up temp file
-                os.unlink(audio_path)
-                
-                return segments
-                
-            except Exception as e:
-                # Clean up temp file on error
-                if os.path.exists(audio_path):
-                    os.unlink(audio_path)
-                raise e
-                
+            # The worker decodes each range straight from the video into a 16 kHz array,
+            # so no intermediate WAV is written or decoded twice
+            return self._get_whisper_worker().transcribe(video_path, ranges, language="en")
+        
         except ImportError:
-            print("⚠️  Whisper not installed. Install with: pip install openai-whisper")
-            return []
+            print("⚠️  Whisper not installed. Install with: pip install faster-whisper (or openai-whisper)")
+            return [[] for _ in ranges]
         except Exception as e:
             print(f"⚠️  Transcription failed: {e}")
-            return []
+            return [[] for _ in ranges]
     
-    def _add_captions_to_clip(self, clip: VideoFileClip, segments: List[Dict]) -> CompositeVideoClip:
-        """Add styled captions to video clip"""
-        if not segments:
-            return clip
-        
-        clips_to_composite = [clip]
+    @staticmethod
+    def _ass_timestamp(seconds: float) -> str:
+        """Format seconds as an ASS timestamp (H:MM:SS.cc)"""
+        centiseconds = int(round(max(0.0, seconds) * 100))
+        hours, remainder = divmod(centiseconds, 360000)
+        minutes, remainder = divmod(remainder, 6000)
+        secs, centiseconds = divmod(remainder, 100)
+        return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+    
+    @staticmethod
+    def _ass_color(color: str, opacity: float = 1.0) -> str:
+        """Convert a color name/hex string to ASS &HAABBGGRR notation"""
+        try:
+            r, g, b = ImageColor.getrgb(color)[:3]
+        except ValueError:
+            r, g, b = 255, 255, 255
+        alpha = int(round((1 - max(0.0, min(1.0, opacity))) * 255))
+        return f"&H{alpha:02X}{b:02X}{g:02X}{r:02X}"
+    
+    @staticmethod
+    def _ffmpeg_filter_path(path: str) -> str:
+        """Quote a file path for use inside an ffmpeg filtergraph"""
+        escaped = str(Path(path).resolve()).replace('\\', '/').replace(':', '\\:').replace("'", "'\\\\\\''")
+        return f"'{escaped}'"
+    
+    @staticmethod
+    def _ass_placement(position: str, width: int, height: int) -> str:
+        """ASS override block placing text at top/center/bottom"""
+        # Anchor point matches the old TextClip placement (top-center of the text box)
+        if position == "bottom":
+            return f"{{\\an8\\pos({width // 2},{int(height * 0.85)})}}"
+        elif position == "top":
+            return f"{{\\an8\\pos({width // 2},0)}}"
+        else:  # center
+            return f"{{\\an5\\pos({width // 2},{height // 2})}}"
+    
+    @staticmethod
+    def _ass_header(width: int, height: int, styles: List[str]) -> List[str]:
+        """Script info, the given style lines and the events format line of an ASS document"""
+        return [
+            "[Script Info]",
+            "ScriptType: v4.00+",
+            f"PlayResX: {width}",
+            f"PlayResY: {height}",
+            "WrapStyle: 0",
+            "ScaledBorderAndShadow: yes",
+            "",
+            "[V4+ Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+            "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+            "Alignment, MarginL, MarginR, MarginV, Encoding",
+            *styles,
+            "",
+            "[Events]",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+        ]
+    
+    def _segments_to_ass(self, segments: List[Dict], width: int, height: int,
+                         title: Optional[str] = None, title_duration: float = 2.0) -> str:
+        """Build an ASS subtitle document with one Dialogue line per segment (plus the title card)"""
         caption_config = self.config.get("captions", {})
+        font_size = caption_config.get("font_size", 48)
+        font_color = self._ass_color(caption_config.get("font_color", "white"))
+        bg_color = self._ass_color(caption_config.get("background_color", "black"),
+                                   caption_config.get("background_opacity", 0.7))
+        placement = self._ass_placement(caption_config.get("position", "bottom"), width, height)
+        
+        # BorderStyle 3 draws an opaque box (in the outline colour) behind each line instead
+        # of an outline; the outline width becomes the box padding
+        if caption_config.get("background_opacity", 0.7) > 0:
+            border_style, outline_color = 3, bg_color
+        else:
+            border_style, outline_color = 1, "&H00000000"
+        
+        margin = int(width * 0.05)
+        lines = self._ass_header(width, height, [
+            f"Style: Default,Arial,{font_size},{font_color},{font_color},{outline_color},{bg_color},"
+            f"-1,0,0,0,100,100,0,0,{border_style},3,0,8,{margin},{margin},0,1",
+            f"Style: Title,Arial,40,&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,"
+            f"-1,0,0,0,100,100,0,0,1,2,0,8,{margin},{margin},0,1",
+        ])
+        
+        # Title card across the top for the first couple of seconds
+        if title:
+            title_text = title[:50].replace("{", "(").replace("}", ")").replace("\n", " ")
+            lines.append(
+                f"Dialogue: 1,{self._ass_timestamp(0)},{self._ass_timestamp(title_duration)},"
+                f"Title,,0,0,0,,{title_text}"
+            )
+        
+        for segment in segments:
+            start_time = segment["start"]
+            end_time = segment["end"]
+            if end_time <= start_time:
+                continue
+            
+            # Braces would start an override block, newlines must use \N
+            text = segment["text"].replace("{", "(").replace("}", ")").replace("\n", "\\N")
+            lines.append(
+                f"Dialogue: 0,{self._ass_timestamp(start_time)},{self._ass_timestamp(end_time)},"
+                f"Default,,0,0,0,,{placement}{text}"
+            )
+        
+        return "\n".join(lines) + "\n"
+    
+    def _overlay_to_ass(self, overlay_config: Dict, width: int, height: int, duration: float) -> Optional[str]:
+        """Build an ASS document for an edit_clip text overlay (None if nothing would show)"""
+        text = overlay_config.get('text', '')
+        start_time = overlay_config.get('start_time', 0)
+        end_time = min(start_time + overlay_config.get('duration', duration), duration)
+        if not text.strip() or start_time >= duration:
+            return None
+        
+        font_size = overlay_config.get('fontsize', 48)
+        font_color = self._ass_color(overlay_config.get('color', 'white'))
+        placement = self._ass_placement(overlay_config.get('position', 'bottom'), width, height)
+        margin = int(width * 0.05)
+        lines = self._ass_header(width, height, [
+            f"Style: Overlay,Arial,{font_size},{font_color},{font_color},&H00000000,&H00000000,"
+            f"-1,0,0,0,100,100,0,0,1,3,0,8,{margin},{margin},0,1",
+        ])
+        text = text.replace("{", "(").replace("}", ")").replace("\n", "\\N")
+        lines.append(
+            f"Dialogue: 0,{self._ass_timestamp(start_time)},{self._ass_timestamp(end_time)},"
+            f"Overlay,,0,0,0,,{placement}{text}"
+        )
+        return "\n".join(lines) + "\n"
+    
+    def _write_subtitles(self, segments: List[Dict], output_path: str, width: int, height: int,
+                         title: Optional[str] = None, title_duration: float = 2.0) -> Optional[str]:
+        """Write caption segments and title to a sidecar .ass file for ffmpeg to burn in"""
+        if not segments and not title:
+            return None
         
         try:
-            for segment in segments:
-                text = segment["text"]
-                start_time = segment["start"]
-                end_time = min(segment["end"], clip.duration)
-                duration = end_time - start_time
-                
-                if duration <= 0:
-                    continue
-                
-                # Style captions based on config
-                font_size = caption_config.get("font_size", 48)
-                font_color = caption_config.get("font_color", "white")
-                bg_color = caption_config.get("background_color", "black")
-                bg_opacity = caption_config.get("background_opacity", 0.7)
-                position = caption_config.get("position", "bottom")
-                
-                # Create text clip
-                txt_clip = TextClip(
-                    text,
-                    fontsize=font_size,
-                    color=font_color,
-                    font='Arial-Bold',
-                    method='caption',
-                    size=(clip.w * 0.9, None),
-                    stroke_color='black',
-                    stroke_width=3
-                ).set_duration(duration).set_start(start_time)
-                
-                # Position caption
-                if position == "bottom":
-                    txt_clip = txt_clip.set_position(('center', clip.h * 0.85))
-                elif position == "top":
-                    txt_clip = txt_clip.set_position(('center', 'top'))
-                else:  # center
-                    txt_clip = txt_clip.set_position('center')
-                
-                # Add background if enabled
-                if bg_opacity > 0:
-                    from moviepy.video.fx.all import margin
-                    # Simple background using margin (full implementation would use ImageClip)
-                    pass
-                
-                clips_to_composite.append(txt_clip)
-            
-            return CompositeVideoClip(clips_to_composite)
-            
+            subtitle_path = Path(output_path).with_suffix('.ass')
+            with open(subtitle_path, 'w', encoding='utf-8') as f:
+                f.write(self._segments_to_ass(segments or [], width, height, title, title_duration))
+            return str(subtitle_path)
         except Exception as e:
             print(f"⚠️  Could not add captions: {e}")
-            return clip
+            return None
     
-    def _add_engaging_elements(self, clip: VideoFileClip, format_type: str, title: str = None, add_captions: bool = True) -> CompositeVideoClip:
-        """Add engaging elements like captions, effects, etc."""
-        clips_to_composite = [clip]
+    def create_clips_batch(self, video_path: str, jobs: List[Dict],
+                           max_workers: Optional[int] = None,
+                           source_info: Optional[Dict] = None) -> List[bool]:
+        """
+        Create several clips from the same video in parallel threads
         
-        # Add title text overlay if provided (for first 2 seconds)
-        if title and len(title) > 0:
-            try:
-                title_clip = TextClip(
-                    title[:50],  # Limit length
-                    fontsize=40,
-                    color='white',
-                    font='Arial-Bold',
-                    method='caption',
-                    size=(clip.w * 0.9, None),
-                    stroke_color='black',
-                    stroke_width=2
-                ).set_position(('center', 'top')).set_duration(min(2, clip.duration))
-                
-                clips_to_composite.append(title_clip)
-            except Exception as e:
-                print(f"⚠️  Could not add title overlay: {e}")
+        create_clip only reads the clip's size and duration in Python; the decode, filters
+        and encode run in its own ffmpeg process, so threads are enough to keep several
+        encodes busy. The source is probed once and shared by every job.
         
-        # Add captions if enabled
-        if add_captions and self.config.get("captions", {}).get("enabled", True):
+        Args:
+            video_path: Source video shared by all jobs
+            jobs: create_clip keyword arguments per clip (start_time, end_time, output_path,
+                format_type, clip_title, segments)
+            max_workers: Concurrent encodes (defaults to half the CPU count, capped by
+                NVENC sessions); the CPU cores are split between the x264 encodes
+            source_info: _source_info() of video_path (probed here if not given)
+        
+        Returns:
+            One success flag per job, in order
+        """
+        if not jobs:
+            return []
+        
+        if max_workers is None:
+            max_workers = (os.cpu_count() or 2) // 2
+            if self.nvenc_available:
+                # Consumer GPUs only allow a few concurrent NVENC sessions
+                max_workers = min(max_workers, self.config.get("hardware_acceleration", {}).get("nvenc_sessions", 3))
+        max_workers = max(1, min(max_workers, len(jobs)))
+        # Every x264 encode would otherwise start a thread pool sized to the whole machine
+        encoder_threads = max(1, (os.cpu_count() or 2) // max_workers) if max_workers > 1 else 0
+        
+        if source_info is None:
             try:
-                segments = self._transcribe_clip_audio(clip)
-                if segments:
-                    return self._add_captions_to_clip(CompositeVideoClip(clips_to_composite), segments)
+                source_info = self._source_info(video_path)
             except Exception as e:
-                print(f"⚠️  Caption generation skipped: {e}")
+                print(f"❌ Error opening video: {e}")
+                return [False] * len(jobs)
         
-        return CompositeVideoClip(clips_to_composite)
+        if max_workers > 1:
+            print(f"🚀 Creating {len(jobs)} clips with {max_workers} workers...")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self.create_clip, video_path, source_info=source_info,
+                                encoder_threads=encoder_threads, **job)
+                for job in jobs
+            ]
+            return [future.result() for future in futures]
     
     def process_url(self, url: str, formats: List[str] = ["tiktok", "youtube_shorts"]) -> List[str]:
         """Main processing function: Download, analyze, and create clips"""
@@ -903,21 +1607,46 @@ Requirements:
             print("âš ï¸ No clips found")
             return []
         
-        # Create clips in requested formats
-        output_files = []
+        # Transcribe every range in one batch, then queue one render job per format
+        jobs = []
         video_name = Path(video_path).stem
         
+        try:
+            source_info = self._source_info(video_path)
+        except Exception as e:
+            print(f"❌ Error opening video: {e}")
+            return []
+        
+        ranges = []
         for i, clip_info in enumerate(clips):
-            start = clip_info["start_time"]
-            end = clip_info["end_time"]
+            # Clamp to the real duration so captions and the cut cover the same range
+            end_time = min(clip_info["end_time"], source_info["duration"])
+            if end_time > clip_info["start_time"]:
+                ranges.append((i, clip_info, end_time))
+            else:
+                print(f"⚠️  Clip {i+1} starts after the end of the video, skipping")
+        
+        all_segments = self._transcribe_clips_audio(
+            video_path, [(clip_info["start_time"], end_time) for _, clip_info, end_time in ranges]
+        )
+        
+        for (i, clip_info, end_time), segments in zip(ranges, all_segments):
             clip_title = clip_info.get("title", f"Clip {i+1}")
-            
             for format_type in formats:
                 output_filename = f"{video_name}_clip{i+1}_{format_type}.mp4"
-                output_path = self.output_dir / output_filename
-                
-                if self.create_clip(video_path, start, end, str(output_path), format_type, clip_title):
-                    output_files.append(str(output_path))
+                jobs.append({
+                    "start_time": clip_info["start_time"],
+                    "end_time": end_time,
+                    "output_path": str(self.output_dir / output_filename),
+                    "format_type": format_type,
+                    "clip_title": clip_title,
+                    "segments": segments
+                })
+        
+        # Render the clips in parallel from the same probe
+        results = self.create_clips_batch(video_path, jobs, source_info=source_info)
+        
+        output_files = [job["output_path"] for job, created in zip(jobs, results) if created]
         
         print(f"\nðŸŽ‰ Successfully created {len(output_files)} clips!")
         return output_files
@@ -949,10 +1678,50 @@ Requirements:
         """
         print(f"✂️ Editing clip: {video_path}")
         
+        if speed is not None and not (isinstance(speed, (int, float)) and math.isfinite(speed) and speed > 0):
+            print(f"❌ Invalid speed: {speed!r} (must be a positive number)")
+            return False
+        
         full_clip = None
         clip = None
+        subtitle_path = None
         try:
+            # Get format settings
+            format_config = self.config["output_formats"].get(format_type, self.config["output_formats"]["tiktok"])
+            target_width = format_config["width"]
+            target_height = format_config["height"]
+            
+            # Trim, speed, crop/resize, color filters and the text overlay (burned in by libass)
+            # all fit in one ffmpeg pass that seeks straight to the trim window; MoviePy is
+            # only needed when ffprobe can't read the file
+            probe = self._probe_video_stream(video_path)
+            if probe:
+                start_time = trim_start if trim_start is not None else 0
+                end_time = trim_end if trim_end is not None else probe["duration"]
+                speed_factor = speed if speed else 1.0
+                if speed_factor != 1.0:
+                    print(f"⚡ Speed adjusted to {speed}x")
+                
+                vf_filters = [_build_filtergraph(probe["width"], probe["height"], target_width, target_height)]
+                vf_filters += self._ffmpeg_color_filters(filters or {})
+                if text_overlay:
+                    output_duration = (min(end_time, probe["duration"]) - start_time) / speed_factor
+                    overlay_ass = self._overlay_to_ass(text_overlay, target_width, target_height, output_duration)
+                    if overlay_ass:
+                        subtitle_path = str(Path(output_path).with_suffix('.ass'))
+                        with open(subtitle_path, 'w', encoding='utf-8') as f:
+                            f.write(overlay_ass)
+                        vf_filters.append(f"ass={self._ffmpeg_filter_path(subtitle_path)}")
+                self._ffmpeg_reencode(
+                    video_path, start_time, end_time, output_path, vf_filters,
+                    fps=format_config["fps"], speed_factor=speed_factor
+                )
+                
+                print(f"✅ Edited clip saved: {output_path}")
+                return True
+            
             # Load video
+            _load_moviepy()
             full_clip = VideoFileClip(video_path)
             
             # Extract subclip if trimming is requested
@@ -985,13 +1754,14 @@ Requirements:
                     clip = MultiplySpeed(clip, speed)
                 print(f"⚡ Speed adjusted to {speed}x")
             
-            # Get format settings
-            format_config = self.config["output_formats"].get(format_type, self.config["output_formats"]["tiktok"])
-            target_width = format_config["width"]
-            target_height = format_config["height"]
-            
-            # Resize to target format
-            clip = self._resize_to_vertical(clip, target_width, target_height)
+            # Crop/resize to target format in the encoder's filtergraph, unless a text overlay
+            # has to be laid out on the target-size frame first (the color filters are per
+            # pixel, so they look the same before scaling)
+            vf_filters = None
+            if text_overlay:
+                clip = self._resize_to_vertical(clip, target_width, target_height)
+            else:
+                vf_filters = [_build_filtergraph(clip.w, clip.h, target_width, target_height)]
             
             # Apply video filters if requested
             if filters:
@@ -1002,14 +1772,7 @@ Requirements:
                 clip = self._add_text_overlay(clip, text_overlay)
             
             # Write output
-            clip.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac',
-                fps=format_config["fps"],
-                preset='medium',
-                bitrate='8000k'
-            )
+            self._write_videofile_threaded(clip, output_path, fps=format_config["fps"], vf_filters=vf_filters)
             
             print(f"✅ Edited clip saved: {output_path}")
             return True
@@ -1018,6 +1781,12 @@ Requirements:
             print(f"❌ Error editing clip: {e}")
             return False
         finally:
+            # The overlay is burned into the video, the sidecar is no longer needed
+            if subtitle_path and os.path.exists(subtitle_path):
+                try:
+                    os.unlink(subtitle_path)
+                except OSError:
+                    pass
             # Clean up clips
             if 'clip' in locals() and clip is not None:
                 try:
@@ -1030,90 +1799,77 @@ Requirements:
                 except:
                     pass
     
-    def _generate_thumbnail(self, clip: VideoFileClip, output_path: str) -> Optional[str]:
+    def _generate_thumbnail(self, output_path: str, duration: float) -> Optional[str]:
         """Generate a thumbnail for the clip"""
         try:
             # Get thumbnail path (same name as video but .jpg)
             thumbnail_path = Path(output_path).with_suffix('.jpg')
             
-            # Extract frame at midpoint of clip
-            frame_time = clip.duration / 2
-            frame = clip.get_frame(frame_time)
-            
-            # Convert numpy array to PIL Image
-            img = Image.fromarray(frame)
-            
-            # Resize thumbnail (keep aspect ratio, max 400px width)
-            max_width = 400
-            if img.width > max_width:
-                ratio = max_width / img.width
-                new_height = int(img.height * ratio)
-                img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Save thumbnail
-            img.save(thumbnail_path, 'JPEG', quality=85)
+            # Seek the written file to the midpoint and decode a single frame, scaled down
+            # to at most 400px wide (keeping aspect ratio) with an area-averaging filter
+            command = [
+                'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+                '-ss', f"{duration / 2:.3f}", '-i', output_path, '-frames:v', '1',
+                '-vf', "scale='min(400,iw)':-2:flags=area", '-q:v', '3', str(thumbnail_path)
+            ]
+            subprocess.run(command, check=True, capture_output=True, text=True)
             
             return str(thumbnail_path)
+        except subprocess.CalledProcessError as e:
+            print(f"⚠️  Could not generate thumbnail: {e.stderr.strip()}")
+            return None
         except Exception as e:
             print(f"⚠️  Could not generate thumbnail: {e}")
             return None
     
     def _apply_filters(self, clip: VideoFileClip, filters: Dict) -> VideoFileClip:
-        """Apply video filters (brightness, contrast, saturation)"""
+        """Apply video filters (brightness, contrast, saturation) in one pass per frame"""
         try:
-            # Import colorx for filters
-            try:
-                if MOVIEPY_VERSION == 2:
-                    from moviepy.video.fx import colorx
-                    Brightness = colorx.colorx
-                    Contrast = colorx.colorx
-                    Saturation = colorx.colorx
-                else:
-                    from moviepy.video.fx.all import colorx
-                    Brightness = colorx
-                    Contrast = colorx
-                    Saturation = colorx
-            except ImportError:
-                # Fallback: use manual color adjustment
-                print("⚠️  Color filters not available, using basic adjustments")
+            brightness = filters.get('brightness', 1.0)
+            contrast = filters.get('contrast', 1.0)
+            saturation = filters.get('saturation', 1.0)
+            if brightness == 1.0 and contrast == 1.0 and saturation == 1.0:
                 return clip
             
-            # Apply brightness
-            if 'brightness' in filters and filters['brightness'] != 1.0:
-                brightness = filters['brightness']
-                try:
-                    if MOVIEPY_VERSION == 2:
-                        clip = clip.fx(lambda c: c.fx(lambda gf: gf * brightness))
-                    else:
-                        # Manual brightness adjustment
-                        clip = clip.fx(lambda gf: gf * brightness)
-                except:
-                    print(f"⚠️  Could not apply brightness filter")
-            
-            # Apply contrast
-            if 'contrast' in filters and filters['contrast'] != 1.0:
-                contrast = filters['contrast']
-                try:
-                    # Contrast adjustment: (pixel - 128) * contrast + 128
-                    if MOVIEPY_VERSION == 2:
-                        clip = clip.fx(lambda c: c.fx(lambda gf: (gf - 128) * contrast + 128))
-                    else:
-                        clip = clip.fx(lambda gf: (gf - 128) * contrast + 128)
-                except:
-                    print(f"⚠️  Could not apply contrast filter")
-            
-            # Apply saturation (simplified - would need proper color space conversion)
-            if 'saturation' in filters and filters['saturation'] != 1.0:
-                saturation = filters['saturation']
-                print(f"📊 Saturation adjustment: {saturation}x (simplified)")
-                # Note: Full saturation requires HSV conversion which is complex
+            # Brightness then contrast ((pixel - 128) * contrast + 128) only depend on the
+            # pixel value, so both fold into one 256-entry lookup table
+            levels = np.clip(np.arange(256, dtype=np.float32) * brightness, 0, 255)
+            lut = np.clip((levels - 128) * contrast + 128, 0, 255).round().astype(np.uint8)
+            luma_weights = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+            
+            def adjust(frame):
+                frame = lut[frame]
+                if saturation != 1.0:
+                    # Blend each pixel with its luma: 0 is grayscale, >1 boosts color
+                    pixels = frame.astype(np.float32)
+                    gray = (pixels @ luma_weights)[..., None]
+                    frame = np.clip(gray + (pixels - gray) * saturation, 0, 255).astype(np.uint8)
+                return frame
             
-            return clip
+            if MOVIEPY_VERSION == 2:
+                return clip.image_transform(adjust)
+            return clip.fl_image(adjust)
             
         except Exception as e:
             print(f"⚠️  Error applying filters: {e}")
             return clip
     
+    @staticmethod
+    def _ffmpeg_color_filters(filters: Dict) -> List[str]:
+        """ffmpeg equivalents of _apply_filters (brightness, contrast, saturation)"""
+        brightness = filters.get('brightness', 1.0)
+        contrast = filters.get('contrast', 1.0)
+        saturation = filters.get('saturation', 1.0)
+        
+        vf_filters = []
+        if brightness != 1.0 or contrast != 1.0:
+            # Same per-channel curve as the lookup table in _apply_filters
+            curve = f"'clip((clip(val*{brightness},0,255)-128)*{contrast}+128,0,255)'"
+            vf_filters.append(f"lutrgb=r={curve}:g={curve}:b={curve}")
+        if saturation != 1.0:
+            vf_filters.append(f"hue=s={saturation}")
+        return vf_filters
+    
     def compile_clips(self, clip_paths: List[str], output_path: str, 
                      transition: str = "fade", transition_duration: float = 0.5,
                      format_type: str = "tiktok") -> bool:
@@ -1133,31 +1889,47 @@ Requirements:
             print("❌ No clips provided for compilation")
             return False
         
+        # Get format settings
+        format_config = self.config["output_formats"].get(format_type, self.config["output_formats"]["tiktok"])
+        target_width = format_config["width"]
+        target_height = format_config["height"]
+        
+        existing_paths = []
+        for clip_path in clip_paths:
+            if os.path.exists(clip_path):
+                existing_paths.append(clip_path)
+            else:
+                print(f"⚠️  Clip not found: {clip_path}, skipping...")
+        
+        if not existing_paths:
+            print("❌ No valid clips to compile")
+            return False
+        
+        # Clips that already share the target size and encoding can be joined without
+        # decoding anything (transitions need re-encoding, so only for hard cuts)
+        if transition in ("cut", "none", "") or len(existing_paths) == 1:
+            if self._ffmpeg_concat_copy(existing_paths, output_path, target_width, target_height):
+                return True
+        
         clips = []
         try:
-            # Load all clips
-            for i, clip_path in enumerate(clip_paths):
-                if not os.path.exists(clip_path):
-                    print(f"⚠️  Clip not found: {clip_path}, skipping...")
-                    continue
-                
-                clip = VideoFileClip(clip_path)
-                
-                # Get format settings and resize if needed
-                format_config = self.config["output_formats"].get(format_type, self.config["output_formats"]["tiktok"])
-                target_width = format_config["width"]
-                target_height = format_config["height"]
-                
-                # Resize to match format
-                if clip.w != target_width or clip.h != target_height:
-                    clip = self._resize_to_vertical(clip, target_width, target_height)
-                
-                clips.append(clip)
-                print(f"✅ Loaded clip {i+1}/{len(clip_paths)}: {Path(clip_path).name}")
-            
-            if not clips:
-                print("❌ No valid clips to compile")
-                return False
+            _load_moviepy()
+            
+            # Load all clips (missing ones were reported above)
+            for i, clip_path in enumerate(existing_paths):
+                clips.append(VideoFileClip(clip_path))
+                print(f"✅ Loaded clip {i+1}/{len(existing_paths)}: {Path(clip_path).name}")
+            
+            # With one shared source size, crop/resize once in the encoder's filtergraph
+            # (fades are per pixel, so they can run before scaling); mixed sizes are
+            # brought to the target size first so they can be chained
+            vf_filters = None
+            source_sizes = {(clip.w, clip.h) for clip in clips}
+            if len(source_sizes) == 1:
+                if source_sizes != {(target_width, target_height)}:
+                    vf_filters = [_build_filtergraph(clips[0].w, clips[0].h, target_width, target_height)]
+            else:
+                clips = [self._resize_to_vertical(clip, target_width, target_height) for clip in clips]
             
             # Apply transitions
             if transition == "fade" and len(clips) > 1:
@@ -1179,24 +1951,15 @@ Requirements:
                     clips[i] = clips[i].fadeout(transition_duration)
                     clips[i+1] = clips[i+1].fadein(transition_duration)
             
-            # Concatenate clips
-            final_clip = concatenate_videoclips(clips, method="compose")
-            
-            # Get format settings
-            format_config = self.config["output_formats"].get(format_type, self.config["output_formats"]["tiktok"])
+            # Concatenate clips. Every clip has the same size by now, so chain them
+            # directly instead of compositing each frame onto a canvas
+            final_clip = concatenate_videoclips(clips, method="chain")
             
             # Write output
-            final_clip.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac',
-                fps=format_config["fps"],
-                preset='medium',
-                bitrate='8000k'
-            )
+            self._write_videofile_threaded(final_clip, output_path, fps=format_config["fps"], vf_filters=vf_filters)
             
             # Generate thumbnail
-            self._generate_thumbnail(final_clip, output_path)
+            self._generate_thumbnail(output_path, final_clip.duration)
             
             # Clean up
             final_clip.close()
@@ -1216,6 +1979,91 @@ Requirements:
                     pass
             return False
     
+    def _probe_video_stream(self, video_path: str) -> Optional[Dict]:
+        """
+        Read the first video stream's size, codec and frame rate plus the duration with ffprobe
+        
+        width/height are the displayed size: ffmpeg autorotates frames before -vf, so a
+        portrait phone video stored as 1920x1080 with a 90 degree rotation reports 1080x1920
+        """
+        try:
+            output = subprocess.check_output(
+                ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+                 '-show_entries', 'stream=width,height,codec_name,pix_fmt,r_frame_rate'
+                 ':stream_side_data=rotation:stream_tags=rotate:format=duration',
+                 '-of', 'json', video_path],
+                timeout=30
+            )
+            probe = json_loads(output)
+            stream = probe["streams"][0]
+            stream["duration"] = float(probe["format"]["duration"])
+            
+            # Rotation lives in the display matrix side data (newer files/ffmpeg) or the
+            # legacy rotate tag
+            rotation = stream.get("tags", {}).get("rotate", 0)
+            for side_data in stream.get("side_data_list", []):
+                rotation = side_data.get("rotation", rotation)
+            if round(float(rotation)) % 180 == 90:
+                stream["width"], stream["height"] = stream["height"], stream["width"]
+            return stream
+        except (OSError, ValueError, KeyError, IndexError, subprocess.SubprocessError):
+            return None
+    
+    @staticmethod
+    def _probe_stream_layout(video_path: str) -> Optional[Tuple]:
+        """Parameters of every stream that must be equal for a stream-copy concat"""
+        fields = ['codec_type', 'codec_name', 'profile', 'width', 'height', 'pix_fmt',
+                  'r_frame_rate', 'time_base', 'sample_rate', 'channels']
+        try:
+            output = subprocess.check_output(
+                ['ffprobe', '-v', 'error', '-show_entries', 'stream=' + ','.join(fields),
+                 '-of', 'json', video_path],
+                timeout=30
+            )
+            streams = json_loads(output)["streams"]
+        except (OSError, ValueError, KeyError, subprocess.SubprocessError):
+            return None
+        return tuple(tuple(stream.get(field) for field in fields) for stream in streams)
+    
+    def _ffmpeg_concat_copy(self, clip_paths: List[str], output_path: str,
+                            target_width: int, target_height: int) -> bool:
+        """Join clips with ffmpeg's concat demuxer without re-encoding, if they are compatible"""
+        probes = [self._probe_video_stream(clip_path) for clip_path in clip_paths]
+        if any(probe is None for probe in probes):
+            return False
+        if any((probe["width"], probe["height"]) != (target_width, target_height) for probe in probes):
+            return False
+        # The concat demuxer doesn't check anything: every stream has to match exactly
+        # (stream-copied clips keep their source's profile and audio) or the output breaks
+        stream_layouts = {self._probe_stream_layout(clip_path) for clip_path in clip_paths}
+        if len(stream_layouts) != 1 or None in stream_layouts:
+            return False
+        
+        list_path = Path(output_path).with_suffix('.concat.txt')
+        try:
+            with open(list_path, 'w', encoding='utf-8') as f:
+                for clip_path in clip_paths:
+                    escaped = os.path.abspath(clip_path).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            command = [
+                'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+                '-f', 'concat', '-safe', '0', '-i', str(list_path),
+                '-c', 'copy', '-movflags', '+faststart', output_path
+            ]
+            subprocess.run(command, check=True, capture_output=True, text=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            details = getattr(e, 'stderr', None) or e
+            print(f"⚠️  Stream copy concat failed, re-encoding instead: {details}")
+            return False
+        finally:
+            if list_path.exists():
+                list_path.unlink()
+        
+        self._generate_thumbnail(output_path, sum(probe["duration"] for probe in probes))
+        print(f"⚡ Joined {len(clip_paths)} clips without re-encoding")
+        print(f"✅ Compiled video saved: {output_path}")
+        return True
+    
     def _add_text_overlay(self, clip: VideoFileClip, overlay_config: Dict) -> CompositeVideoClip:
         """Add text overlay to clip"""
         try:
@@ -1226,28 +2074,26 @@ Requirements:
             start_time = overlay_config.get('start_time', 0)
             duration = overlay_config.get('duration', clip.duration)
             
-            if not text:
+            # Nothing would be visible: skip the composite (and its re-render) entirely
+            if not text.strip() or start_time >= clip.duration:
                 return clip
             
-            # Create text clip
-            txt_clip = TextClip(
-                text,
-                fontsize=fontsize,
-                color=color,
-                font='Arial-Bold',
-                method='caption',
-                size=(clip.w * 0.9, None),
-                stroke_color='black',
-                stroke_width=3
-            ).set_duration(min(duration, clip.duration)).set_start(start_time)
+            # Render the text once with Pillow and show it as a static image
+            text_image = self._render_caption_image(text, int(clip.w * 0.9), fontsize, color)
+            txt_clip = ImageClip(text_image, transparent=True)
             
             # Position text
             if position == "bottom":
-                txt_clip = txt_clip.set_position(('center', clip.h * 0.85))
+                text_position = ('center', clip.h * 0.85)
             elif position == "top":
-                txt_clip = txt_clip.set_position(('center', 'top'))
+                text_position = ('center', 'top')
             else:  # center
-                txt_clip = txt_clip.set_position('center')
+                text_position = 'center'
+            
+            if MOVIEPY_VERSION == 2:
+                txt_clip = txt_clip.with_duration(min(duration, clip.duration)).with_start(start_time).with_position(text_position)
+            else:
+                txt_clip = txt_clip.set_duration(min(duration, clip.duration)).set_start(start_time).set_position(text_position)
             
             return CompositeVideoClip([clip, txt_clip])
             
@@ -1255,6 +2101,58 @@ Requirements:
             print(f"⚠️  Could not add text overlay: {e}")
             return clip
     
+    @classmethod
+    def _get_font(cls, size: int) -> ImageFont.ImageFont:
+        """Load a bold font at the given size, reusing it across overlays"""
+        font = cls._font_cache.get(size)
+        if font is None:
+            for font_name in ("arialbd.ttf", "Arial Bold.ttf", "DejaVuSans-Bold.ttf"):
+                try:
+                    font = ImageFont.truetype(font_name, size)
+                    break
+                except OSError:
+                    continue
+            else:
+                try:
+                    font = ImageFont.load_default(size)
+                except TypeError:
+                    # Pillow < 10.1 only ships the fixed-size bitmap font
+                    font = ImageFont.load_default()
+            cls._font_cache[size] = font
+        return font
+    
+    def _render_caption_image(self, text: str, wrap_width: int, font_size: int,
+                              color: str = "white", stroke_width: int = 3) -> np.ndarray:
+        """Render wrapped, outlined text to an RGBA array sized to fit it"""
+        font = self._get_font(font_size)
+        measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+        
+        # Greedy word wrap to the available width
+        lines = []
+        for paragraph in text.splitlines() or [""]:
+            line = ""
+            for word in paragraph.split():
+                candidate = f"{line} {word}".strip()
+                if line and measure.textlength(candidate, font=font) > wrap_width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        wrapped = "\n".join(lines)
+        
+        left, top, right, bottom = measure.multiline_textbbox(
+            (0, 0), wrapped, font=font, align="center", stroke_width=stroke_width
+        )
+        left, top = math.floor(left), math.floor(top)
+        right, bottom = math.ceil(right), math.ceil(bottom)
+        image = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+        ImageDraw.Draw(image).multiline_text(
+            (-left, -top), wrapped, font=font, fill=color, align="center",
+            stroke_width=stroke_width, stroke_fill="black"
+        )
+        return np.asarray(image)
+    
     def process_uploaded_video(self, video_path: str, output_path: str, 
                                format_type: str = "tiktok") -> bool:
         """
@@ -1269,35 +2167,32 @@ Requirements:
         
         clip = None
         try:
-            # Load video
-            clip = VideoFileClip(video_path)
-            
             # Get format settings
             format_config = self.config["output_formats"].get(format_type, self.config["output_formats"]["tiktok"])
             target_width = format_config["width"]
             target_height = format_config["height"]
             
-            # Resize to target format
-            clip = self._resize_to_vertical(clip, target_width, target_height)
+            # Only the size and duration are needed; read them without decoding if possible
+            probe = self._probe_video_stream(video_path)
+            if probe:
+                width, height, duration = probe["width"], probe["height"], probe["duration"]
+            else:
+                _load_moviepy()
+                clip = VideoFileClip(video_path)
+                width, height, duration = clip.w, clip.h, clip.duration
             
             # Check duration and speed up if needed
             max_duration = format_config["duration_max"]
-            if clip.duration > max_duration:
-                speed_factor = clip.duration / max_duration
-                if MOVIEPY_VERSION == 2:
-                    clip = clip.fx(MultiplySpeed, speed_factor)
-                else:
-                    clip = MultiplySpeed(clip, speed_factor)
+            speed_factor = 1.0
+            if duration > max_duration:
+                speed_factor = duration / max_duration
                 print(f"⚡ Sped up by {speed_factor:.2f}x to fit duration")
             
-            # Write output
-            clip.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac',
-                fps=format_config["fps"],
-                preset='medium',
-                bitrate='8000k'
+            # Crop/resize to target format and retime in a single ffmpeg pass
+            self._ffmpeg_reencode(
+                video_path, 0, duration, output_path,
+                [_build_filtergraph(width, height, target_width, target_height)],
+                fps=format_config["fps"], speed_factor=speed_factor
             )
             
             print(f"✅ Processed video saved: {output_path}")
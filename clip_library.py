@@ -2,77 +2,345 @@
 Clip Library - Store and manage generated clips with metadata
 """
 
-import sqlite3
+import atexit
 import json
+import queue
+import sqlite3
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 import os
 
+from json_utils import json_dumps, json_loads
+
+INSERT_CLIP_SQL = '''
+    INSERT INTO clips (
+        job_id, video_url, video_title, clip_filename, clip_path,
+        thumbnail_path, format_type, clip_title, reason,
+        engagement_score, start_time, end_time, duration, tags
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# INSERT ... RETURNING needs SQLite 3.35+; older builds fall back to cursor.lastrowid
+SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# PRAGMA optimize only checks every table (not just ones this connection queried, which
+# for the writer is none of the get_clips tables) from SQLite 3.46 on
+SQLITE_OPTIMIZE_ALL_TABLES = sqlite3.sqlite_version_info >= (3, 46, 0)
+
+# get_clips filter clauses; bit i of a query's filter mask selects CLIP_FILTER_SQL[i]
+CLIP_FILTER_SQL = (
+    " AND format_type = ?",
+    " AND id IN (SELECT rowid FROM clips_fts WHERE clips_fts MATCH ?)",
+    " AND (clip_title LIKE ? ESCAPE '\\' OR reason LIKE ? ESCAPE '\\' OR video_title LIKE ? ESCAPE '\\')",
+    " AND engagement_score >= ?",
+    " AND engagement_score <= ?",
+    # Compare created_at directly (not DATE(created_at)) so the index can be used;
+    # 'YYYY-MM-DD HH:MM:SS' timestamps sort as text
+    " AND created_at >= DATE(?)",
+    " AND created_at < DATE(?, '+1 day')",
+    " AND id IN (SELECT clip_id FROM clip_tags WHERE tag = ?)",
+    # Without JSON1 there is no clip_tags table; match the JSON-encoded tag instead, both
+    # as written now (raw UTF-8) and by older versions without orjson (\uXXXX escapes)
+    " AND (tags LIKE ? ESCAPE '\\' OR tags LIKE ? ESCAPE '\\')",
+)
+
+# Read caches: clips by id (LRU) and statistics (short-lived)
+CLIP_CACHE_SIZE = 1024
+STATS_CACHE_TTL = 5.0
+
+# View/download counts are buffered in memory and written at most this often (seconds)
+COUNTER_FLUSH_INTERVAL = 2.0
+
+# Planner statistics are refreshed after writes at most this often (seconds)
+OPTIMIZE_INTERVAL = 600.0
+
+# Read-only connections for queries, so reads run side by side under WAL
+READ_POOL_SIZE = 4
+
 class ClipLibrary:
     def __init__(self, db_path: str = "clip_library.db"):
         """Initialize the clip library database"""
         self.db_path = db_path
+        
+        # One long-lived connection shared by the Flask request threads, in autocommit
+        # mode; the lock serialises access to it. sqlite3 keeps compiled statements per
+        # connection keyed by SQL text, sized here for every get_clips filter combination
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None,
+                                     cached_statements=128)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        
+        # Cached reads, kept in step with writes made through this instance
+        self._clip_cache: "OrderedDict[int, Dict]" = OrderedDict()
+        self._stats_cache: Optional[Tuple[float, Dict]] = None
+        # Bumped on every change; results read outside the lock are only cached if it didn't move
+        self._cache_generation = 0
+        
+        # get_clips SQL per (filter mask, sort column, sort order, keyset): reusing the exact
+        # string keeps each combination on one compiled statement in sqlite3's cache
+        self._query_cache: Dict[Tuple[int, str, str, Optional[str]], str] = {}
+        
+        # Pending counter increments per column, written back by flush_counters
+        self._pending_counts: Dict[str, Counter] = {"views": Counter(), "downloads": Counter()}
+        self._flush_timer: Optional[threading.Timer] = None
+        self._closed = False
+        self._last_optimize = 0.0
+        atexit.register(self.close)
+        
+        # WAL lets readers run alongside a writer and avoids creating a journal file per
+        # write; NORMAL sync is still crash-safe in WAL mode
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute("PRAGMA mmap_size=268435456")
+        self._conn.execute("PRAGMA cache_size=-20000")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        
         self.init_database()
+        self._read_pool = self._open_read_pool()
+    
+    def _open_read_pool(self) -> Optional[queue.SimpleQueue]:
+        """Open READ_POOL_SIZE read-only connections (None for in-memory databases)"""
+        if self.db_path == ":memory:" or self.db_path.startswith("file:"):
+            return None
+        
+        pool = queue.SimpleQueue()
+        uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        for _ in range(READ_POOL_SIZE):
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None,
+                                   cached_statements=128)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA cache_size=-20000")
+            pool.put(conn)
+        return pool
+    
+    @contextmanager
+    def _reader(self):
+        """Borrow a read-only connection; falls back to the shared one (under the lock)"""
+        if self._read_pool is None:
+            with self._lock:
+                yield self._conn
+            return
+        
+        pool = self._read_pool
+        conn = pool.get()
+        try:
+            yield conn
+        finally:
+            pool.put(conn)
+    
+    def close(self):
+        """Write pending counters, refresh planner statistics and close the database connections"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self.flush_counters()
+            
+            # Close the idle readers; one still borrowed is closed when it's garbage collected
+            if self._read_pool is not None:
+                while True:
+                    try:
+                        self._read_pool.get_nowait().close()
+                    except queue.Empty:
+                        break
+                self._read_pool = None
+            
+            self.optimize()
+            self._conn.close()
+    
+    def optimize(self):
+        """Re-analyze the tables whose planner statistics have gone stale"""
+        with self._lock:
+            if SQLITE_OPTIMIZE_ALL_TABLES:
+                self._conn.execute("PRAGMA optimize=0x10002")
+            else:
+                # Bounded by analysis_limit, so this stays cheap on large tables
+                self._conn.execute("ANALYZE")
+            self._last_optimize = time.monotonic()
+    
+    def _maybe_optimize(self):
+        """Run optimize() if OPTIMIZE_INTERVAL has passed since the last run"""
+        if time.monotonic() - self._last_optimize >= OPTIMIZE_INTERVAL:
+            self.optimize()
     
     def init_database(self):
         """Create database tables if they don't exist"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._lock:
+            cursor = self._conn.cursor()
+            
+            # Clips table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS clips (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    video_url TEXT NOT NULL,
+                    video_title TEXT,
+                    clip_filename TEXT NOT NULL,
+                    clip_path TEXT NOT NULL,
+                    thumbnail_path TEXT,
+                    format_type TEXT NOT NULL,
+                    clip_title TEXT,
+                    reason TEXT,
+                    engagement_score REAL,
+                    start_time REAL,
+                    end_time REAL,
+                    duration REAL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    tags TEXT,
+                    views INTEGER DEFAULT 0,
+                    downloads INTEGER DEFAULT 0
+                )
+            ''')
+            
+            # Jobs table for tracking processing
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT UNIQUE NOT NULL,
+                    video_url TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    formats TEXT,
+                    output_count INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    completed_at TIMESTAMP
+                )
+            ''')
+            
+            # Indexes for the get_clips filters and sort orders
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_clips_created ON clips(created_at DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_clips_format_created ON clips(format_type, created_at DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_clips_score ON clips(engagement_score DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_clips_views ON clips(views DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_clips_downloads ON clips(downloads DESC)")
+            
+            # Full-text index over the searchable columns, kept in sync by triggers
+            self.fts_enabled = self._create_search_index(cursor)
+            
+            # One row per (tag, clip), so tag filters are an index seek
+            self.tag_index_enabled = self._create_tag_index(cursor)
+            
+            # Give the query planner statistics to choose between the indexes with;
+            # analysis_limit samples large tables instead of reading them in full
+            cursor.execute("PRAGMA analysis_limit=1000")
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                cursor.execute("ANALYZE")
+    
+    def _create_search_index(self, cursor: sqlite3.Cursor) -> bool:
+        """Create the FTS5 search table and its triggers (False if SQLite lacks FTS5)"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'clips_fts'")
+        exists = cursor.fetchone() is not None
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS clips_fts USING fts5(
+                    clip_title, reason, video_title,
+                    content='clips', content_rowid='id', tokenize='porter unicode61'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  Full-text search not available, using LIKE search: {e}")
+            return False
         
-        # Clips table
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS clips (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                job_id TEXT NOT NULL,
-                video_url TEXT NOT NULL,
-                video_title TEXT,
-                clip_filename TEXT NOT NULL,
-                clip_path TEXT NOT NULL,
-                thumbnail_path TEXT,
-                format_type TEXT NOT NULL,
-                clip_title TEXT,
-                reason TEXT,
-                engagement_score REAL,
-                start_time REAL,
-                end_time REAL,
-                duration REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                tags TEXT,
-                views INTEGER DEFAULT 0,
-                downloads INTEGER DEFAULT 0
-            )
+            CREATE TRIGGER IF NOT EXISTS clips_fts_insert AFTER INSERT ON clips BEGIN
+                INSERT INTO clips_fts(rowid, clip_title, reason, video_title)
+                VALUES (new.id, new.clip_title, new.reason, new.video_title);
+            END
         ''')
-        
-        # Jobs table for tracking processing
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS jobs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                job_id TEXT UNIQUE NOT NULL,
-                video_url TEXT NOT NULL,
-                status TEXT NOT NULL,
-                formats TEXT,
-                output_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                completed_at TIMESTAMP
-            )
+            CREATE TRIGGER IF NOT EXISTS clips_fts_delete AFTER DELETE ON clips BEGIN
+                INSERT INTO clips_fts(clips_fts, rowid, clip_title, reason, video_title)
+                VALUES ('delete', old.id, old.clip_title, old.reason, old.video_title);
+            END
+        ''')
+        # Only text changes touch the index (view/download counters don't)
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS clips_fts_update AFTER UPDATE OF clip_title, reason, video_title ON clips BEGIN
+                INSERT INTO clips_fts(clips_fts, rowid, clip_title, reason, video_title)
+                VALUES ('delete', old.id, old.clip_title, old.reason, old.video_title);
+                INSERT INTO clips_fts(rowid, clip_title, reason, video_title)
+                VALUES (new.id, new.clip_title, new.reason, new.video_title);
+            END
         ''')
         
-        conn.commit()
-        conn.close()
+        # Index clips saved before the search table existed
+        if not exists:
+            cursor.execute("INSERT INTO clips_fts(clips_fts) VALUES ('rebuild')")
+        return True
     
-    def save_clip(self, clip_data: Dict) -> int:
-        """Save a clip to the library"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _create_tag_index(self, cursor: sqlite3.Cursor) -> bool:
+        """Create the clip_tags table, filled from the JSON tags by triggers (False without JSON1)"""
+        try:
+            cursor.execute("SELECT json_valid('[]')")
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  SQLite JSON functions not available, tag filters will scan clips: {e}")
+            return False
+        
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'clip_tags'")
+        exists = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS clip_tags (
+                tag TEXT NOT NULL,
+                clip_id INTEGER NOT NULL,
+                PRIMARY KEY (tag, clip_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_clip_tags_clip ON clip_tags(clip_id)")
         
         cursor.execute('''
-            INSERT INTO clips (
-                job_id, video_url, video_title, clip_filename, clip_path,
-                thumbnail_path, format_type, clip_title, reason,
-                engagement_score, start_time, end_time, duration, tags
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+            CREATE TRIGGER IF NOT EXISTS clip_tags_insert AFTER INSERT ON clips
+            WHEN json_valid(new.tags) BEGIN
+                INSERT OR IGNORE INTO clip_tags(tag, clip_id)
+                SELECT value, new.id FROM json_each(new.tags) WHERE type = 'text';
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS clip_tags_delete AFTER DELETE ON clips BEGIN
+                DELETE FROM clip_tags WHERE clip_id = old.id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS clip_tags_update AFTER UPDATE OF tags ON clips BEGIN
+                DELETE FROM clip_tags WHERE clip_id = old.id;
+                INSERT OR IGNORE INTO clip_tags(tag, clip_id)
+                SELECT value, new.id FROM json_each(new.tags)
+                WHERE json_valid(new.tags) AND type = 'text';
+            END
+        ''')
+        
+        # Index the tags of clips saved before the table existed
+        if not exists:
+            cursor.execute('''
+                INSERT OR IGNORE INTO clip_tags(tag, clip_id)
+                SELECT tag.value, clips.id FROM clips, json_each(clips.tags) AS tag
+                WHERE json_valid(clips.tags) AND tag.type = 'text'
+            ''')
+        return True
+    
+    @staticmethod
+    def _fts_query(search: str) -> str:
+        """Turn free text into an FTS5 query: every word must match (as a prefix)"""
+        words = re.findall(r"\w+", search)
+        return " ".join(f'"{word}"*' for word in words)
+    
+    @staticmethod
+    def _like_pattern(text: str) -> str:
+        """LIKE pattern matching text anywhere, with its own % and _ taken literally"""
+        escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f"%{escaped}%"
+    
+    @staticmethod
+    def _clip_row(clip_data: Dict) -> tuple:
+        """Parameters for INSERT_CLIP_SQL from a clip dict"""
+        return (
             clip_data.get('job_id'),
             clip_data.get('video_url'),
             clip_data.get('video_title'),
@@ -86,34 +354,72 @@ class ClipLibrary:
             clip_data.get('start_time'),
             clip_data.get('end_time'),
             clip_data.get('duration'),
-            json.dumps(clip_data.get('tags', []))
-        ))
+            json_dumps(clip_data.get('tags') or [])
+        )
+    
+    def save_clip(self, clip_data: Dict) -> int:
+        """Save a clip to the library"""
+        with self._lock:
+            cursor = self._conn.cursor()
+            self._stats_cache = None
+            self._cache_generation += 1
+            if SQLITE_HAS_RETURNING:
+                cursor.execute(INSERT_CLIP_SQL + " RETURNING id", self._clip_row(clip_data))
+                return cursor.fetchone()[0]
+            cursor.execute(INSERT_CLIP_SQL, self._clip_row(clip_data))
+            return cursor.lastrowid
+    
+    def save_clips(self, clips: List[Dict]) -> List[int]:
+        """Save several clips in one transaction (one commit instead of one per clip)"""
+        if not clips:
+            return []
+        
+        rows = [self._clip_row(clip_data) for clip_data in clips]
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.executemany(INSERT_CLIP_SQL, rows)
+                cursor.execute("SELECT last_insert_rowid()")
+                last_id = cursor.fetchone()[0]
+                cursor.execute("COMMIT")
+                self._stats_cache = None
+                self._cache_generation += 1
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            
+            # The table just grew, so the statistics may be stale
+            self._maybe_optimize()
         
-        clip_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return clip_id
+        # The write lock was held for the whole batch, so the AUTOINCREMENT ids are consecutive
+        return list(range(last_id - len(rows) + 1, last_id + 1))
     
     def save_job(self, job_data: Dict):
         """Save job information"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO jobs (
-                job_id, video_url, status, formats, output_count, completed_at
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            job_data.get('job_id'),
-            job_data.get('video_url'),
-            job_data.get('status'),
-            json.dumps(job_data.get('formats', [])),
-            job_data.get('output_count', 0),
-            datetime.now().isoformat() if job_data.get('status') == 'completed' else None
-        ))
-        
-        conn.commit()
-        conn.close()
+        with self._lock:
+            cursor = self._conn.cursor()
+            
+            # Upsert in place (INSERT OR REPLACE deletes and re-inserts the row and its
+            # index entries); SQLite stamps completed_at itself
+            cursor.execute('''
+                INSERT INTO jobs (
+                    job_id, video_url, status, formats, output_count, completed_at
+                ) VALUES (?, ?, ?, ?, ?, CASE WHEN ?3 = 'completed' THEN CURRENT_TIMESTAMP END)
+                ON CONFLICT(job_id) DO UPDATE SET
+                    video_url = excluded.video_url,
+                    status = excluded.status,
+                    formats = excluded.formats,
+                    output_count = excluded.output_count,
+                    completed_at = CASE WHEN excluded.status = 'completed'
+                                        THEN CURRENT_TIMESTAMP ELSE jobs.completed_at END
+            ''', (
+                job_data.get('job_id'),
+                job_data.get('video_url'),
+                job_data.get('status'),
+                json_dumps(job_data.get('formats') or []),
+                job_data.get('output_count', 0)
+            ))
     
     def get_clips(self, limit: int = 50, offset: int = 0, 
                   format_type: Optional[str] = None,
@@ -123,150 +429,326 @@ class ClipLibrary:
                   date_from: Optional[str] = None,
                   date_to: Optional[str] = None,
                   sort_by: str = "created_at",
-                  sort_order: str = "DESC") -> List[Dict]:
-        """Get clips with optional filtering and sorting"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM clips WHERE 1=1"
+                  sort_order: str = "DESC",
+                  after: Optional[Tuple[Any, int]] = None,
+                  tag: Optional[str] = None) -> List[Dict]:
+        """
+        Get clips with optional filtering and sorting
+        
+        Pass the previous page's next_cursor() as `after` to page by keyset instead of
+        offset: SQLite then seeks in the sort index rather than reading and discarding
+        every skipped row. `offset` still works but is deprecated for paging
+        """
+        # Views/downloads can be sorted on, so write buffered increments first
+        self.flush_counters()
+        with self._reader() as conn:
+            cursor = self._select_clips(
+                conn, limit=limit, offset=offset, format_type=format_type, search=search,
+                min_score=min_score, max_score=max_score, date_from=date_from, date_to=date_to,
+                sort_by=sort_by, sort_order=sort_order, after=after, tag=tag
+            )
+            return [self._row_to_clip(row) for row in cursor.fetchall()]
+    
+    def iter_clips(self, batch_size: int = 200, **filters) -> Iterator[Dict]:
+        """
+        Yield clips one at a time; takes the same filters as get_clips, without a limit by default
+        
+        Rows are fetched batch_size at a time, so exports of the whole library don't hold
+        every clip in memory at once
+        """
+        self.flush_counters()
+        with self._reader() as conn:
+            cursor = self._select_clips(conn, **filters)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield self._row_to_clip(row)
+    
+    def _select_clips(self, conn: sqlite3.Connection, limit: int = -1, offset: int = 0,
+                      format_type: Optional[str] = None,
+                      search: Optional[str] = None,
+                      min_score: Optional[float] = None,
+                      max_score: Optional[float] = None,
+                      date_from: Optional[str] = None,
+                      date_to: Optional[str] = None,
+                      sort_by: str = "created_at",
+                      sort_order: str = "DESC",
+                      after: Optional[Tuple[Any, int]] = None,
+                      tag: Optional[str] = None) -> sqlite3.Cursor:
+        """Run the filtered clips query on conn and return the cursor (a negative limit means no limit)"""
+        mask = 0
         params = []
         
         if format_type:
-            query += " AND format_type = ?"
+            mask |= 1 << 0
             params.append(format_type)
         
-        if search:
-            query += " AND (clip_title LIKE ? OR reason LIKE ? OR video_title LIKE ?)"
-            search_term = f"%{search}%"
+        fts_query = self._fts_query(search) if search and self.fts_enabled else ""
+        if fts_query:
+            mask |= 1 << 1
+            params.append(fts_query)
+        elif search:
+            # No FTS5, or nothing FTS can tokenize (e.g. only punctuation): substring match
+            mask |= 1 << 2
+            search_term = self._like_pattern(search)
             params.extend([search_term, search_term, search_term])
         
         if min_score is not None:
-            query += " AND engagement_score >= ?"
+            mask |= 1 << 3
             params.append(min_score)
         
         if max_score is not None:
-            query += " AND engagement_score <= ?"
+            mask |= 1 << 4
             params.append(max_score)
         
         if date_from:
-            query += " AND DATE(created_at) >= ?"
+            mask |= 1 << 5
             params.append(date_from)
         
         if date_to:
-            query += " AND DATE(created_at) <= ?"
+            mask |= 1 << 6
             params.append(date_to)
         
-        # Validate sort_by to prevent SQL injection
+        if tag and self.tag_index_enabled:
+            mask |= 1 << 7
+            params.append(tag)
+        elif tag:
+            mask |= 1 << 8
+            params.append(self._like_pattern(json_dumps(tag)))
+            params.append(self._like_pattern(json.dumps(tag)))
+        
+        sort_by, sort_order = self._sort_key(sort_by, sort_order)
+        
+        keyset = None
+        if after is not None:
+            after_value, after_id = after
+            if after_value is None:
+                keyset = "null"
+                params.append(after_id)
+            else:
+                keyset = "value"
+                params.extend([after_value, after_id])
+            offset = 0
+        params.extend([limit, offset])
+        
+        key = (mask, sort_by, sort_order, keyset)
+        query = self._query_cache.get(key)
+        if query is None:
+            query = self._query_cache[key] = self._clips_query(*key)
+        
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return cursor
+    
+    @staticmethod
+    def _clips_query(mask: int, sort_by: str, sort_order: str, keyset: Optional[str]) -> str:
+        """
+        Build the get_clips SQL for a filter mask (sort_by/sort_order already validated)
+        
+        keyset is None (no cursor), "value" (cursor on a sort value) or "null" (cursor on a
+        NULL sort value). NULLs sort first ascending and last descending, and a row-value
+        comparison with NULL matches nothing, so NULL rows get their own branches
+        """
+        query = "SELECT * FROM clips WHERE 1=1" + "".join(
+            clause for i, clause in enumerate(CLIP_FILTER_SQL) if mask & (1 << i)
+        )
+        
+        # id breaks ties so rows sharing a sort value are neither repeated nor skipped
+        op = '<' if sort_order == 'DESC' else '>'
+        if keyset == "value":
+            null_rows = f" OR {sort_by} IS NULL" if sort_order == 'DESC' else ""
+            query += f" AND (({sort_by}, id) {op} (?, ?){null_rows})"
+        elif keyset == "null":
+            value_rows = f" OR {sort_by} IS NOT NULL" if sort_order == 'ASC' else ""
+            query += f" AND (({sort_by} IS NULL AND id {op} ?){value_rows})"
+        
+        return query + f" ORDER BY {sort_by} {sort_order}, id {sort_order} LIMIT ? OFFSET ?"
+    
+    @staticmethod
+    def _row_to_clip(row: sqlite3.Row) -> Dict:
+        """Clip dict from a clips row, with tags decoded"""
+        clip = dict(row)
+        tags = clip['tags']
+        # Most clips have no tags; skip the JSON parser for them
+        clip['tags'] = json_loads(tags) if tags and tags != '[]' else []
+        return clip
+    
+    @staticmethod
+    def _sort_key(sort_by: str, sort_order: str) -> Tuple[str, str]:
+        """Validate the sort column and direction (they are formatted into the SQL)"""
         valid_sort_fields = ["created_at", "engagement_score", "views", "downloads", "duration", "clip_title"]
         if sort_by not in valid_sort_fields:
             sort_by = "created_at"
         
-        # Validate sort_order
-        if sort_order.upper() not in ["ASC", "DESC"]:
+        sort_order = sort_order.upper()
+        if sort_order not in ["ASC", "DESC"]:
             sort_order = "DESC"
         
-        query += f" ORDER BY {sort_by} {sort_order} LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        clips = []
-        for row in rows:
-            clip = dict(row)
-            clip['tags'] = json.loads(clip.get('tags', '[]'))
-            clips.append(clip)
-        
-        conn.close()
-        return clips
+        return sort_by, sort_order
+    
+    def next_cursor(self, clips: List[Dict], sort_by: str = "created_at") -> Optional[Tuple[Any, int]]:
+        """Keyset cursor for the page after `clips`, to pass to get_clips(after=...)"""
+        if not clips:
+            return None
+        sort_by, _ = self._sort_key(sort_by, "DESC")
+        return (clips[-1][sort_by], clips[-1]['id'])
     
     def get_clip_by_id(self, clip_id: int) -> Optional[Dict]:
         """Get a specific clip by ID"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self._lock:
+            clip = self._clip_cache.get(clip_id)
+            if clip is not None:
+                self._clip_cache.move_to_end(clip_id)
+                # Callers get their own copy so they can't alter the cached entry
+                return {**clip, 'tags': list(clip['tags'])}
+            
+            # Read-your-writes: buffered counters go to the database before reading it
+            self.flush_counters()
+            generation = self._cache_generation
         
-        cursor.execute("SELECT * FROM clips WHERE id = ?", (clip_id,))
-        row = cursor.fetchone()
+        with self._reader() as conn:
+            row = conn.execute("SELECT * FROM clips WHERE id = ?", (clip_id,)).fetchone()
         
-        if row:
-            clip = dict(row)
-            clip['tags'] = json.loads(clip.get('tags', '[]'))
-            conn.close()
-            return clip
+        if not row:
+            return None
         
-        conn.close()
-        return None
+        clip = self._row_to_clip(row)
+        with self._lock:
+            if generation == self._cache_generation:
+                self._clip_cache[clip_id] = clip
+                if len(self._clip_cache) > CLIP_CACHE_SIZE:
+                    self._clip_cache.popitem(last=False)
+        
+        return {**clip, 'tags': list(clip['tags'])}
+    
+    def invalidate_clip(self, clip_id: int):
+        """Drop a clip (and the statistics) from the read caches"""
+        with self._lock:
+            self._clip_cache.pop(clip_id, None)
+            self._stats_cache = None
+            self._cache_generation += 1
+    
+    def _increment_counter(self, clip_id: int, column: str):
+        """Add one to a clip's views/downloads in memory; flush_counters writes it later"""
+        with self._lock:
+            self._pending_counts[column][clip_id] += 1
+            clip = self._clip_cache.get(clip_id)
+            if clip is not None:
+                clip[column] += 1
+            self._stats_cache = None
+            self._cache_generation += 1
+            
+            # After close() nothing could write these back, so don't start a timer
+            if self._flush_timer is None and not self._closed:
+                self._flush_timer = threading.Timer(COUNTER_FLUSH_INTERVAL, self.flush_counters)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def flush_counters(self):
+        """Write buffered view/download increments in one transaction"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not any(self._pending_counts.values()):
+                return
+            
+            pending = self._pending_counts
+            self._pending_counts = {"views": Counter(), "downloads": Counter()}
+            cursor = self._conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                for column, counts in pending.items():
+                    cursor.executemany(
+                        f"UPDATE clips SET {column} = {column} + ? WHERE id = ?",
+                        [(count, clip_id) for clip_id, count in counts.items()]
+                    )
+                cursor.execute("COMMIT")
+            except Exception:
+                # Keep the increments for the next flush instead of dropping them
+                for column, counts in pending.items():
+                    self._pending_counts[column].update(counts)
+                if self._conn.in_transaction:
+                    cursor.execute("ROLLBACK")
+                raise
+            
+            self._maybe_optimize()
     
     def increment_views(self, clip_id: int):
         """Increment view count for a clip"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("UPDATE clips SET views = views + 1 WHERE id = ?", (clip_id,))
-        conn.commit()
-        conn.close()
+        self._increment_counter(clip_id, "views")
     
     def increment_downloads(self, clip_id: int):
         """Increment download count for a clip"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("UPDATE clips SET downloads = downloads + 1 WHERE id = ?", (clip_id,))
-        conn.commit()
-        conn.close()
+        self._increment_counter(clip_id, "downloads")
     
     def delete_clip(self, clip_id: int) -> bool:
         """Delete a clip from the library"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get clip path first
-        cursor.execute("SELECT clip_path FROM clips WHERE id = ?", (clip_id,))
-        row = cursor.fetchone()
-        
-        if row:
-            clip_path = row[0]
-            # Delete file if it exists
-            if os.path.exists(clip_path):
-                try:
-                    os.remove(clip_path)
-                except:
-                    pass
+        with self._lock:
+            cursor = self._conn.cursor()
             
-            # Delete from database
-            cursor.execute("DELETE FROM clips WHERE id = ?", (clip_id,))
-            conn.commit()
-            conn.close()
-            return True
-        
-        conn.close()
-        return False
+            # Delete the row and get its file path in one statement
+            if SQLITE_HAS_RETURNING:
+                cursor.execute("DELETE FROM clips WHERE id = ? RETURNING clip_path", (clip_id,))
+                row = cursor.fetchone()
+            else:
+                cursor.execute("SELECT clip_path FROM clips WHERE id = ?", (clip_id,))
+                row = cursor.fetchone()
+                if row:
+                    cursor.execute("DELETE FROM clips WHERE id = ?", (clip_id,))
+            
+            if not row:
+                return False
+            
+            self.invalidate_clip(clip_id)
+        
+        # Unlink directly instead of checking exists() first; a missing file is fine
+        clip_path = row[0]
+        if clip_path:
+            try:
+                os.unlink(clip_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"⚠️  Could not delete clip file {clip_path}: {e}")
+        
+        return True
     
     def get_statistics(self) -> Dict:
         """Get library statistics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._lock:
+            if self._stats_cache and time.monotonic() - self._stats_cache[0] < STATS_CACHE_TTL:
+                stats = self._stats_cache[1]
+                return {**stats, 'by_format': dict(stats['by_format'])}
+            
+            self.flush_counters()
+            generation = self._cache_generation
         
         stats = {}
-        
-        # Total clips
-        cursor.execute("SELECT COUNT(*) FROM clips")
-        stats['total_clips'] = cursor.fetchone()[0]
-        
-        # Clips by format
-        cursor.execute("SELECT format_type, COUNT(*) FROM clips GROUP BY format_type")
-        stats['by_format'] = dict(cursor.fetchall())
-        
-        # Average engagement score
-        cursor.execute("SELECT AVG(engagement_score) FROM clips WHERE engagement_score > 0")
-        stats['avg_engagement'] = cursor.fetchone()[0] or 0
-        
-        # Total views and downloads
-        cursor.execute("SELECT SUM(views), SUM(downloads) FROM clips")
-        row = cursor.fetchone()
-        stats['total_views'] = row[0] or 0
-        stats['total_downloads'] = row[1] or 0
-        
-        conn.close()
-        return stats
-
+        with self._reader() as conn:
+            cursor = conn.cursor()
+            
+            # Totals, average engagement score, views and downloads in one table scan
+            cursor.execute('''
+                SELECT COUNT(*),
+                       AVG(CASE WHEN engagement_score > 0 THEN engagement_score END),
+                       COALESCE(SUM(views), 0),
+                       COALESCE(SUM(downloads), 0)
+                FROM clips
+            ''')
+            row = cursor.fetchone()
+            stats['total_clips'] = row[0]
+            stats['avg_engagement'] = row[1] or 0
+            stats['total_views'] = row[2]
+            stats['total_downloads'] = row[3]
+            
+            # Clips by format
+            cursor.execute("SELECT format_type, COUNT(*) FROM clips GROUP BY format_type")
+            stats['by_format'] = dict(cursor.fetchall())
+        
+        with self._lock:
+            if generation == self._cache_generation:
+                self._stats_cache = (time.monotonic(), stats)
+        return {**stats, 'by_format': dict(stats['by_format'])}
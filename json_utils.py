@@ -0,0 +1,21 @@
+"""
+JSON Utils - json_loads/json_dumps backed by orjson when it is installed
+"""
+
+import json
+
+# Try to import orjson for faster JSON parsing (optional)
+try:
+    import orjson
+    
+    def json_loads(data):
+        return orjson.loads(data)
+    
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    json_loads = json.loads
+    
+    def json_dumps(obj) -> str:
+        # Same text orjson produces: non-ASCII characters stay as UTF-8, not \uXXXX escapes
+        return json.dumps(obj, ensure_ascii=False)
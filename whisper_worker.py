@@ -0,0 +1,164 @@
+"""
+Whisper Worker - Keeps a Whisper model loaded between transcriptions
+Started by ClipGenerator as a subprocess; reads one JSON request per line on stdin
+and answers with one JSON response per line on stdout
+"""
+
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def load_audio(path: str, start: float, end: float) -> np.ndarray:
+    """Decode a time range of a media file to mono float32 PCM at 16 kHz, without a temp file"""
+    command = [
+        'ffmpeg', '-nostdin', '-v', 'error', '-ss', f"{start:.3f}", '-t', f"{max(end - start, 0):.3f}",
+        '-i', path, '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 'f32le', '-'
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode audio: {result.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def warm_up(transcribe_one):
+    """Pay for CUDA context setup and kernel selection now instead of on the first clip"""
+    # VAD would drop the silent warm-up audio before it reached the encoder, so skip it
+    transcribe_one(np.zeros(SAMPLE_RATE, dtype=np.float32), "en", vad_filter=False)
+
+
+def load_faster_whisper(model_name: str, device: str, compute_type: str):
+    """faster-whisper BatchedInferencePipeline transcriber, warmed up (raises if it can't run here)"""
+    from faster_whisper import WhisperModel, BatchedInferencePipeline
+    
+    model = WhisperModel(model_name, device=device, compute_type=compute_type)
+    pipeline = BatchedInferencePipeline(model=model)
+    
+    def transcribe_one(audio, language, vad_filter=True):
+        # The VAD pass skips silent stretches instead of decoding them
+        segments, _ = pipeline.transcribe(audio, language=language, task="transcribe",
+                                          batch_size=16, vad_filter=vad_filter)
+        return [{"text": segment.text.strip(), "start": segment.start, "end": segment.end} for segment in segments]
+    
+    # A CUDA build without a usable driver/cuDNN often only fails on the first inference
+    warm_up(transcribe_one)
+    return transcribe_one
+
+
+def load_openai_whisper(model_name: str):
+    """openai-whisper transcriber"""
+    import torch
+    import whisper
+    
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = whisper.load_model(model_name, device=device)
+    if device == "cuda":
+        # Half-precision weights avoid casting them on every call; the clip lengths
+        # repeat, so let cuDNN pick the fastest convolution kernels once
+        model = model.half()
+        torch.backends.cudnn.benchmark = True
+    
+    def transcribe_one(audio, language, vad_filter=True):
+        # fp16 only helps (and only works) on the GPU
+        result = model.transcribe(audio, language=language, task="transcribe", fp16=(device == "cuda"))
+        return [
+            {"text": segment["text"].strip(), "start": segment["start"], "end": segment["end"]}
+            for segment in result.get("segments", [])
+        ]
+    
+    try:
+        warm_up(transcribe_one)
+    except Exception as e:
+        print(f"Whisper warm-up failed: {e}", file=sys.stderr)
+    return transcribe_one
+
+
+def load_transcriber(model_name: str):
+    """
+    Load the model once and return a function transcribing a list of audio ranges
+    
+    Prefers faster-whisper's BatchedInferencePipeline (runs the 30 s windows of each
+    file through the encoder in batches): on the GPU, then on the CPU if CUDA/cuDNN
+    isn't usable. Falls back to openai-whisper
+    """
+    transcribe_one = None
+    try:
+        import ctranslate2
+        
+        attempts = []
+        if ctranslate2.get_cuda_device_count() > 0:
+            attempts.append(("cuda", "float16"))
+        # int8 weights on the CPU: a quarter of the memory traffic and VNNI dot products
+        attempts.append(("cpu", "int8"))
+        for device, compute_type in attempts:
+            try:
+                transcribe_one = load_faster_whisper(model_name, device, compute_type)
+                break
+            except ImportError:
+                raise
+            except Exception as e:
+                print(f"faster-whisper failed on {device} ({compute_type}): {e}", file=sys.stderr)
+    except ImportError:
+        pass
+    
+    if transcribe_one is None:
+        transcribe_one = load_openai_whisper(model_name)
+    
+    def transcribe(sources, language):
+        results = []
+        for source in sources:
+            try:
+                # Both backends take 16 kHz float32 arrays directly and skip their own decoding
+                audio = load_audio(source["path"], source["start"], source["end"])
+                results.append({"segments": transcribe_one(audio, language)})
+            except Exception as e:
+                results.append({"error": str(e)})
+        return results
+    
+    return transcribe
+
+
+def main():
+    """Load the model once, then serve transcription requests until stdin closes"""
+    model_name = sys.argv[1] if len(sys.argv) > 1 else "base"
+    
+    # Keep the protocol channel clean: anything libraries print goes to stderr
+    protocol = sys.stdout
+    sys.stdout = sys.stderr
+    
+    transcribe = None
+    load_error = None
+    try:
+        transcribe = load_transcriber(model_name)
+    except Exception as e:
+        load_error = f"Could not load Whisper model '{model_name}': {e}"
+    
+    # Tell the parent loading is over (a load error is reported per request), so its
+    # request timeouts don't include the model download
+    protocol.write(json.dumps({"ready": transcribe is not None}) + "\n")
+    protocol.flush()
+    
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        
+        try:
+            if transcribe is None:
+                raise RuntimeError(load_error)
+            
+            # Every request carries a batch of audio ranges; each gets its own result or error
+            request = json.loads(line)
+            response = {"results": transcribe(request["sources"], request.get("language", "en"))}
+        except Exception as e:
+            response = {"error": str(e)}
+        
+        protocol.write(json.dumps(response) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()